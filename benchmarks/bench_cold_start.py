@@ -0,0 +1,149 @@
+"""
+冷启动基准：比较从 JSON 和二进制快照加载商品数据的耗时，
+并检查索引带来的常驻内存和启动时间开销
+
+用法:
+    python -m benchmarks.bench_cold_start [商品数量] [--check]
+
+--check 时索引开销超出预算则以非零状态退出
+"""
+
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.models.product import Product, ProductCategory, ProductManager, ProductStatus
+from src.storage.json_storage import JsonFileStorage
+
+CAMPUSES = ["东校区", "西校区", "主校区", "南校区", "北校区"]
+CONDITIONS = ["全新", "九成新", "七成新", "五成新"]
+# 随机取字生成标题和描述，片段种类接近真实文本，不会因大量重复而低估索引大小
+CHARS = [chr(code) for code in range(0x4E00, 0x4E00 + 3000)]
+DESCRIPTION_LENGTH = 300
+
+# 完整的 ProductManager 相对只构造 Product 对象的上限
+MAX_MEMORY_RATIO = 1.6
+MAX_STARTUP_RATIO = 2.5
+
+
+def build_records(count: int) -> dict:
+    rng = random.Random(42)
+    categories = list(ProductCategory)
+    records = {}
+    for i in range(1, count + 1):
+        title = "".join(rng.choice(CHARS) for _ in range(rng.randint(6, 16)))
+        description = "".join(rng.choice(CHARS) for _ in range(DESCRIPTION_LENGTH))
+        product = Product(str(i), title, description,
+                          round(rng.uniform(1, 3000), 2), rng.choice(categories),
+                          str(rng.randint(1, count // 20 + 1)), rng.choice(CAMPUSES),
+                          rng.choice(CONDITIONS))
+        product.status = ProductStatus.ON_SALE if rng.random() < 0.8 else ProductStatus.PENDING
+        product.create_time = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00"
+        records[product.product_id] = product.to_dict()
+    return records
+
+
+def timed_read(data_file: str, binary_snapshot: bool) -> float:
+    """只读取并还原记录的耗时"""
+    storage = JsonFileStorage(data_file, binary_snapshot=binary_snapshot)
+    start = time.perf_counter()
+    count = sum(1 for _ in storage.iter_records())
+    elapsed = time.perf_counter() - start
+    assert count
+    return elapsed
+
+
+def timed_load(data_file: str, binary_snapshot: bool) -> float:
+    """完整构建 ProductManager（含建索引）的耗时"""
+    start = time.perf_counter()
+    manager = ProductManager(data_file, binary_snapshot=binary_snapshot)
+    elapsed = time.perf_counter() - start
+    assert manager.products
+    return elapsed
+
+
+def bare_load(data_file: str) -> dict:
+    """只构造 Product 对象、不建索引，作为开销的比较基准"""
+    return {pid: Product.from_dict(record)
+            for pid, record in JsonFileStorage(data_file).iter_records()}
+
+
+def resident_memory(load) -> float:
+    """load() 返回的对象常驻的内存（MB）"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        loaded = load()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert loaded
+    return current / 1e6
+
+
+def timed(load) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    loaded = load()
+    elapsed = time.perf_counter() - start
+    assert loaded
+    return elapsed
+
+
+def check_overhead(data_file: str) -> bool:
+    """比较完整启动与只构造对象的内存和耗时，返回是否在预算之内"""
+    manager_load = lambda: ProductManager(data_file)
+    base_mb = resident_memory(lambda: bare_load(data_file))
+    manager_mb = resident_memory(manager_load)
+    base_time = min(timed(lambda: bare_load(data_file)) for _ in range(3))
+    manager_time = min(timed(manager_load) for _ in range(3))
+
+    print(f"{'':10}{'常驻内存':>10}{'启动耗时':>10}")
+    print(f"{'只构造对象':10}{base_mb:9.1f}M{base_time:9.2f}s")
+    print(f"{'完整启动':10}{manager_mb:9.1f}M{manager_time:9.2f}s")
+    ok = True
+    if manager_mb > base_mb * MAX_MEMORY_RATIO:
+        print(f"内存超出预算: {manager_mb / base_mb:.2f}x > {MAX_MEMORY_RATIO}x")
+        ok = False
+    if manager_time > base_time * MAX_STARTUP_RATIO:
+        print(f"启动耗时超出预算: {manager_time / base_time:.2f}x > {MAX_STARTUP_RATIO}x")
+        ok = False
+    return ok
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != "--check"]
+    check = "--check" in sys.argv[1:]
+    count = int(args[0]) if args else 100_000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_file = os.path.join(tmp_dir, "products.json")
+        records = build_records(count)
+        JsonFileStorage(data_file, binary_snapshot=True).save({}, lambda: records)
+        # 释放生成的数据，避免常驻对象拖慢计时期间的垃圾回收
+        del records
+        gc.collect()
+
+        json_size = os.path.getsize(data_file)
+        snap_size = os.path.getsize(data_file + ".snap")
+        json_read = min(timed_read(data_file, False) for _ in range(3))
+        snap_read = min(timed_read(data_file, True) for _ in range(3))
+        json_load = timed_load(data_file, False)
+        snap_load = timed_load(data_file, True)
+
+        print(f"商品数量: {count}")
+        print(f"{'':6}{'文件大小':>10}{'读取记录':>10}{'完整启动':>10}")
+        print(f"{'JSON':6}{json_size / 1e6:9.1f}M{json_read:9.2f}s{json_load:9.2f}s")
+        print(f"{'快照':6}{snap_size / 1e6:9.1f}M{snap_read:9.2f}s{snap_load:9.2f}s")
+        print(f"读取记录加速比: {json_read / snap_read:.1f}x")
+        print()
+        within_budget = check_overhead(data_file)
+    if check and not within_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,12 @@ from src.ui.login_frame import LoginFrame
 from src.ui.main_frame import MainFrame
 from src.ui.product_frame import ProductPublishFrame
 from src.ui.admin_frame import AdminFrame
+from src.utils.logger import configure_logging
 
 class CampusMarketApp:
+    # 检查其他进程是否更新了数据目录的间隔（毫秒）
+    RELOAD_INTERVAL_MS = 3000
+    
     def __init__(self, root):
         self.root = root
         self.root.title("校易集 - 校园二手交易平台")
@@ -27,6 +31,18 @@ class CampusMarketApp:
         
         # 显示登录界面
         self.show_login_frame()
+        
+        # 同一数据目录可能有多个实例同时运行，定期检查并读入其他实例的修改
+        self.root.after(self.RELOAD_INTERVAL_MS, self.check_external_changes)
+    
+    def check_external_changes(self):
+        """其他实例写入了新数据时重新读取，界面通过商品变更事件更新"""
+        try:
+            self.auth_service.user_manager.reload_if_changed()
+            self.product_service.product_manager.reload_if_changed()
+        finally:
+            # 某次读取出错也继续轮询
+            self.root.after(self.RELOAD_INTERVAL_MS, self.check_external_changes)
     
     def setup_styles(self):
         """设置自定义样式"""
@@ -107,6 +123,7 @@ class CampusMarketApp:
             widget.destroy()
 
 if __name__ == "__main__":
+    configure_logging()
     root = tk.Tk()
     app = CampusMarketApp(root)
     root.mainloop()
\ No newline at end of file
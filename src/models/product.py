@@ -1,8 +1,26 @@
+import base64
 import json
 import os
+import sys
+import threading
+import types
+import weakref
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
 from enum import Enum
+from src.models.product_index import AttributeIndex, NGramIndex, PriceIndex, TimeIndex
+from src.storage.base import StorageBackend
+from src.storage.coalescer import WriteCoalescer
+from src.storage.factory import create_storage
+from src.storage.id_allocator import IdAllocator, default_seq_file, max_numeric_id
+from src.storage.mmap_catalog import publish_catalog
+from src.storage.sqlite_storage import PRODUCT_COLUMNS
+from src.utils.concurrency import NullReadWriteLock, ReadWriteLock
+from src.utils.logger import get_logger
+from src.utils.timestamps import TIME_FORMAT, pack_timestamp, unpack_timestamp
+
+logger = get_logger(__name__)
 
 class ProductStatus(Enum):
     PENDING = "待审核"
@@ -18,9 +36,22 @@ class ProductCategory(Enum):
     DAILY = "生活用品"
     OTHER = "其他"
 
+# 描述和图片尚未从存储中加载的占位值
+_NOT_LOADED = object()
+
+def _intern(value):
+    # 校区和新旧程度取值很少，驻留后所有商品共享同一个字符串对象
+    return sys.intern(value) if isinstance(value, str) else value
+
 class Product:
+    # 用 __slots__ 去掉每个实例的 __dict__，大量商品常驻内存时显著省内存
+    __slots__ = ('product_id', 'title', '_description', 'price', 'original_price', 'category',
+                 'seller_id', 'campus', 'condition', 'status', '_create_time', '_images',
+                 'view_count', 'like_count', '_details_loader')
+    
     def __init__(self, product_id: str, title: str, description: str, price: float,
                  category: ProductCategory, seller_id: str, campus: str, condition: str = "九成新"):
+        self._details_loader = None
         self.product_id = product_id
         self.title = title
         self.description = description
@@ -28,14 +59,43 @@ class Product:
         self.original_price = price * 1.2  # 模拟原价
         self.category = category
         self.seller_id = seller_id
-        self.campus = campus
-        self.condition = condition
+        self.campus = _intern(campus)
+        self.condition = _intern(condition)
         self.status = ProductStatus.PENDING
-        self.create_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.create_time = datetime.now().strftime(TIME_FORMAT)
         self.images = []
         self.view_count = 0
         self.like_count = 0
     
+    @property
+    def description(self) -> str:
+        if self._details_loader is not None:
+            return self._details_loader(self)[0]
+        return self._description
+    
+    @description.setter
+    def description(self, value: str):
+        self._description = value
+    
+    @property
+    def images(self) -> list:
+        if self._details_loader is not None:
+            return self._details_loader(self)[1]
+        return self._images
+    
+    @images.setter
+    def images(self, value: list):
+        self._images = value
+    
+    @property
+    def create_time(self) -> str:
+        return unpack_timestamp(self._create_time)
+    
+    @create_time.setter
+    def create_time(self, value: str):
+        # 内部以整数秒保存，读取时还原为原字符串
+        self._create_time = pack_timestamp(value)
+    
     def to_dict(self) -> Dict:
         return {
             'product_id': self.product_id,
@@ -54,90 +114,719 @@ class Product:
             'like_count': self.like_count
         }
     
+    def same_listing(self, other: "Product") -> bool:
+        """除描述和图片外的字段是否都相同，只比较常驻内存的字段，不会触发按需加载"""
+        return all(getattr(self, name) == getattr(other, name) for name in _LISTING_SLOTS)
+    
     @classmethod
     def from_dict(cls, data: Dict):
-        product = cls(
-            data['product_id'],
-            data['title'],
-            data['description'],
-            data['price'],
-            ProductCategory(data['category']),
-            data['seller_id'],
-            data['campus'],
-            data.get('condition', '九成新')
-        )
+        # 不经过 __init__，加载时不必为每条记录生成一次当前时间
+        product = cls.__new__(cls)
+        product._details_loader = None
+        product.product_id = data['product_id']
+        product.title = data['title']
+        product._description = data.get('description', "")
+        product.price = data['price']
         product.original_price = data.get('original_price', product.price * 1.2)
+        product.category = ProductCategory(data['category'])
+        product.seller_id = data['seller_id']
+        product.campus = _intern(data['campus'])
+        product.condition = _intern(data.get('condition', '九成新'))
         product.status = ProductStatus(data['status'])
         product.create_time = data.get('create_time')
-        product.images = data.get('images', [])
+        product._images = data.get('images', [])
         product.view_count = data.get('view_count', 0)
         product.like_count = data.get('like_count', 0)
         return product
 
+# 列表展示所需、lazy_details 模式下常驻内存的字段
+_LISTING_SLOTS = tuple(name for name in Product.__slots__
+                       if name not in ('_description', '_images', '_details_loader'))
+# lazy_details 模式下加载时不读取的记录字段
+_DETAIL_FIELDS = ('description', 'images')
+
+# 商品变更事件的类型
+EVENT_ADDED = "add"
+EVENT_APPROVED = "approve"
+EVENT_STATUS_CHANGED = "status"
+EVENT_UPDATED = "update"  # 整条记录被替换，如读入其他进程的修改
+EVENT_REMOVED = "remove"
+
+class ProductEvent(NamedTuple):
+    """商品变更事件，seq 在同一个 ProductManager 内严格递增"""
+    seq: int
+    kind: str
+    product_id: str
+    status: Optional[ProductStatus]  # 变更后的状态，删除时为 None
+    old_status: Optional[ProductStatus] = None
+
+# search_products 支持的排序方式
+SORT_OPTIONS = ("time", "price_asc", "price_desc")
+
+def encode_cursor(product=None, offset: int = None, sort_by: str = "time") -> str:
+    """生成不透明的分页游标
+
+    给出上一页最后一个商品（Product 或 to_dict 得到的字典）时，游标记录它在
+    sort_by 排序下的键：按时间为 (create_time, product_id)，按价格为 (price, product_id)，
+    下一页从该键之后继续，翻页期间有商品增删也不会跳过或重复。
+    只给出 offset 时记录偏移量。
+    """
+    if product is None:
+        payload = {'o': offset}
+    else:
+        if sort_by not in SORT_OPTIONS:
+            raise ValueError(f"不支持的排序方式: {sort_by}")
+        if isinstance(product, dict):
+            create_time, price, product_id = product['create_time'], product['price'], product['product_id']
+        else:
+            create_time, price, product_id = product.create_time, product.price, product.product_id
+        value = (create_time or "") if sort_by == "time" else price
+        payload = {'s': sort_by, 'k': [value, product_id]}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str):
+    """解析分页游标
+
+    Returns:
+        (排序方式, 排序键, 偏移量)，偏移量游标的前两项为 None
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if 'o' in payload:
+            return None, None, int(payload['o'])
+        sort_by = payload['s']
+        value, product_id = payload['k']
+        if sort_by == "time":
+            return sort_by, TimeIndex.key(value, product_id), 0
+        if sort_by in SORT_OPTIONS:
+            return sort_by, PriceIndex.key(float(value), product_id), 0
+        raise ValueError(sort_by)
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+def past_cursor(sort_by: str, key: tuple, cursor_key: tuple) -> bool:
+    """排序键为 key 的商品是否排在游标之后，"price_asc" 为升序，其余为降序"""
+    return key > cursor_key if sort_by == "price_asc" else key < cursor_key
+
 class ProductManager:
-    def __init__(self, data_file: str = None):
+    def __init__(self, data_file: str = None, storage_mode: str = "json",
+                 journal_threshold: int = 1000, storage: StorageBackend = None,
+                 load_progress: Callable[[int, int], None] = None,
+                 lazy_details: bool = False, detail_cache_size: int = 1000,
+                 binary_snapshot: bool = False, catalog_file: str = None,
+                 save_delay: float = 0.0, id_allocator: IdAllocator = None,
+                 thread_safe: bool = False, change_log_size: int = 1000,
+                 catalog_delay: float = 1.0):
+        """
+        Args:
+            storage_mode: 存储模式，见 create_storage
+            journal_threshold: journal 模式下触发压缩的日志条数
+            storage: 直接指定存储后端，优先于 storage_mode
+            load_progress: 启动加载进度回调，参数为 (已处理量, 总量)
+            lazy_details: 只加载和常驻列表展示所需字段，描述和图片用到时再从存储读取，
+                          需要支持按主键读取和查询的存储后端（如 sqlite），
+                          关键词搜索在存储中匹配描述
+            detail_cache_size: lazy_details 模式下常驻内存的完整商品数量上限
+            binary_snapshot: json 模式下同时维护二进制快照，启动时优先读取
+            catalog_file: 保存后把全部商品发布为内存映射目录，
+                          供 CatalogProductManager 只读打开
+            save_delay: 变更后等待多少秒再写入存储，窗口内的多次变更合并为一次写入，
+                        写入在后台计时线程中进行，大于 0 时必须同时启用 thread_safe；
+                        0 表示每次变更立即写入
+            id_allocator: 新商品ID的分配器，默认使用与数据文件同名的 .seq 序列文件
+            thread_safe: 用读写锁保护商品和索引，允许其他线程在修改的同时查询；
+                         写入存储在锁外进行，查询不会被缓慢的保存阻塞
+            change_log_size: 保留最近多少条变更事件供 changes_since 查询
+            catalog_delay: 保存后等待多少秒再发布目录，窗口内的多次保存只发布一次，
+                           发布在后台计时线程中进行，不阻塞保存；0 表示每次保存后立即发布
+        """
         # 使用绝对路径确保能找到数据文件
         if data_file is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             data_file = os.path.join(current_dir, '..', '..', 'data', 'products.json')
         self.data_file = data_file
-        print(f"商品数据文件路径: {self.data_file}")  # 调试信息
-        self.products = self._load_products()
+        if storage is None:
+            storage = create_storage(storage_mode, data_file, 'products', PRODUCT_COLUMNS,
+                                     'product_id', journal_threshold, binary_snapshot)
+        self.storage = storage
+        if save_delay > 0 and not thread_safe:
+            raise ValueError("save_delay 大于 0 时在后台线程写入，需要同时启用 thread_safe")
+        if lazy_details and not (storage.supports_random_access and storage.supports_queries):
+            raise ValueError("lazy_details 需要支持按主键读取和查询的存储后端，如 sqlite")
+        self.lazy_details = lazy_details
+        # 存储支持查询时（如 sqlite），搜索和按状态、卖家查询都在存储中执行，不建内存索引
+        self._memory_indexes = not storage.supports_queries
+        self.detail_cache_size = detail_cache_size
+        # 已加载完整描述和图片的商品ID，按最近使用排序
+        self._hydrated = OrderedDict()
+        self._details_lock = threading.RLock()
+        self._details_loader = self._load_details
+        # 每次修改商品数据时递增，供查询结果缓存判断是否过期
+        self.generation = 0
+        self._rw_lock = ReadWriteLock() if thread_safe else NullReadWriteLock()
+        # 变更事件：最近的事件保存在 _change_log，尚未通知订阅者的在 _undispatched
+        self.change_seq = 0
+        self._change_log = deque(maxlen=change_log_size)
+        self._undispatched = []
+        self._events_lock = threading.Lock()
+        self._subscribers = []
+        # 订阅者只在创建管理器的线程中调用，如 Tk 界面的主线程
+        self._owner_thread = threading.get_ident()
+        self._writer = WriteCoalescer(self._flush_products, save_delay,
+                                      self._trim_details if lazy_details else None)
+        logger.debug("商品数据文件路径: %s", self.data_file)
+        # 读取前记录数据版本，读取期间若有其他进程写入，之后检查时会发现变化
+        self._data_signature = self.storage.data_signature()
+        self.products = self._load_products(load_progress)
+        if id_allocator is None:
+            id_allocator = IdAllocator(default_seq_file(data_file))
+        id_allocator.floor = max(id_allocator.floor, max_numeric_id(self.products))
+        self.id_allocator = id_allocator
+        self.catalog_file = catalog_file
+        # 目录每次都整体重写，只需知道有没有变更，主键列表不使用
+        self._catalog_writer = WriteCoalescer(lambda product_ids: self.publish_catalog(), catalog_delay)
+        if catalog_file and not os.path.exists(catalog_file):
+            self.publish_catalog()
     
-    def _load_products(self) -> Dict[str, Product]:
+    def _reset_indexes(self):
+        self.keyword_index = NGramIndex()
+        self.status_index = AttributeIndex()
+        self.category_index = AttributeIndex()
+        self.campus_index = AttributeIndex()
+        self.seller_index = AttributeIndex()
+        self.price_index = PriceIndex()  # 仅包含在售商品
+        self.time_index = TimeIndex()  # 仅包含在售商品
+    
+    def _load_products(self, progress: Callable[[int, int], None] = None) -> Dict[str, Product]:
+        self._reset_indexes()
         try:
-            print(f"正在加载商品数据从: {self.data_file}")  # 调试信息
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                print(f"成功加载 {len(data)} 个商品")  # 调试信息
-                return {pid: Product.from_dict(product_data) for pid, product_data in data.items()}
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"加载商品数据失败: {e}")  # 调试信息
-            return {}
-    
-    def _save_products(self):
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump({pid: product.to_dict() for pid, product in self.products.items()}, f, indent=2, ensure_ascii=False)
+            logger.debug("正在加载商品数据从: %s", self.data_file)
+            # 逐条解析、逐条建立索引，不在内存中同时保留全部原始记录；
+            # 有序索引逐条插入是平方复杂度，最后整体排序一次
+            products = {}
+            on_sale = []
+            for pid, product_data in self._iter_stored(progress):
+                product = Product.from_dict(product_data)
+                products[pid] = product
+                self._index_product(product, ordered=False)
+                if self._memory_indexes and product.status == ProductStatus.ON_SALE:
+                    on_sale.append(product)
+                if self.lazy_details:
+                    self._unload_details(product)
+            self.price_index.extend((product.price, product.product_id) for product in on_sale)
+            self.time_index.extend((product._create_time, product.product_id) for product in on_sale)
+            logger.info("成功加载 %d 个商品", len(products))
+            return products
+        except FileNotFoundError as e:
+            logger.warning("加载商品数据失败: %s", e)
+        except json.JSONDecodeError as e:
+            # 不能把损坏的文件当作空数据继续用，否则下一次保存会覆盖掉它
+            backup = self.storage.backup_corrupt()
+            logger.error("商品数据文件已损坏，已备份到 %s: %s", backup, e)
+        self._reset_indexes()
+        return {}
     
-    def add_product(self, product: Product) -> bool:
-        self.products[product.product_id] = product
-        self._save_products()
+    def _iter_stored(self, progress: Callable[[int, int], None] = None):
+        """读取存储中的全部记录，lazy_details 模式下不含描述和图片"""
+        if self.lazy_details:
+            return self.storage.iter_summaries(_DETAIL_FIELDS, progress)
+        return self.storage.iter_records(progress)
+    
+    def _unload_details(self, product: Product):
+        """丢弃常驻的描述和图片，下次访问时从存储读取"""
+        product._description = _NOT_LOADED
+        product._images = _NOT_LOADED
+        product._details_loader = self._details_loader
+    
+    def _load_details(self, product: Product):
+        """lazy_details 模式下访问描述或图片时调用，按需读取并维护 LRU
+
+        Returns:
+            (描述, 图片)，在锁内读出，不会读到刚被其他线程淘汰的占位值
+        """
+        pid = product.product_id
+        with self._details_lock:
+            if product._description is not _NOT_LOADED:
+                if pid in self._hydrated:
+                    self._hydrated.move_to_end(pid)
+                return product._description, product._images
+            record = self.storage.get(pid) or {}
+            product._description = record.get('description', "")
+            product._images = record.get('images', [])
+            details = product._description, product._images
+            self._hydrated[pid] = None
+            self._evict_details()
+            return details
+    
+    def _track_details(self, product: Product):
+        """已持久化的商品加入 LRU，之后可以被淘汰"""
+        with self._details_lock:
+            product._details_loader = self._details_loader
+            self._hydrated[product.product_id] = None
+            self._hydrated.move_to_end(product.product_id)
+            self._evict_details()
+    
+    def _evict_details(self):
+        # 尚未写入存储的商品不能丢弃详情，否则之后无法再读回来
+        unflushed = []
+        while len(self._hydrated) > self.detail_cache_size:
+            evicted_pid, _ = self._hydrated.popitem(last=False)
+            if self._writer.is_pending(evicted_pid):
+                unflushed.append(evicted_pid)
+            else:
+                self._unload_details(self.products[evicted_pid])
+        for pid in unflushed:
+            self._hydrated[pid] = None
+    
+    def _trim_details(self):
+        # 写出期间序列化会重新加载整批商品的详情，且它们仍是待写状态无法淘汰，写出完成后再淘汰一次
+        with self._details_lock:
+            self._evict_details()
+    
+    def _save_products(self, product_ids: List[str]):
+        """标记变更的商品，由 WriteCoalescer 决定何时写入存储"""
+        self._writer.mark(product_ids)
+    
+    def flush(self):
+        """立即写入全部尚未持久化的变更，并发布等待中的目录"""
+        self._writer.flush()
+        self._catalog_writer.flush()
+    
+    def _flush_products(self, product_ids: List[str]):
+        # 文件锁保证多个进程不会同时改写数据文件
+        with self.storage.locked():
+            if self.storage.data_signature() != self._data_signature:
+                # 其他进程在上次读写之后写入过，先合并它们的修改再写回，避免整体覆盖
+                self._merge_records(self._iter_stored())
+            # 只在序列化时持有读锁，写文件期间修改和查询都可以继续
+            with self._rw_lock.read_locked():
+                changes = {pid: self.products[pid].to_dict() for pid in product_ids}
+            self.storage.save(changes, self._snapshot_records)
+            self._data_signature = self.storage.data_signature()
+        # 合并产生的事件在释放文件锁之后通知，回调中再次保存不会死锁
+        self._dispatch_events()
+        if self.catalog_file:
+            self._catalog_writer.mark(product_ids)
+    
+    def reload_if_changed(self) -> bool:
+        """其他进程写入了新数据时重新读取
+
+        本进程尚未写出的修改保留，其余商品以存储中的数据为准。
+        同时通知其他线程产生、尚未通知的变更事件。
+
+        Returns:
+            数据是否有变化
+        """
+        changed = self._reload()
+        # 在文件锁外通知，回调中再次保存不会死锁
+        self._dispatch_events()
+        return changed
+    
+    def _reload(self) -> bool:
+        with self.storage.locked(shared=True):
+            signature = self.storage.data_signature()
+            if signature == self._data_signature:
+                return False
+            try:
+                self._merge_records(self._iter_stored())
+            except json.JSONDecodeError as e:
+                logger.warning("重新读取商品数据失败，继续使用内存中的数据: %s", e)
+                return False
+            self._data_signature = signature
+        logger.info("检测到其他进程更新了商品数据，已重新读取")
         return True
     
+    def _merge_records(self, records):
+        """用存储中的记录替换内存中没有未写出修改的商品"""
+        records = dict(records)
+        with self._rw_lock.write_locked():
+            removed_ids = []
+            for pid in [pid for pid in self.products if pid not in records]:
+                if not self._writer.is_pending(pid):
+                    removed = self.products.pop(pid)
+                    self._unindex_product(removed)
+                    self._record_event(EVENT_REMOVED, pid, None, removed.status)
+                    removed_ids.append(pid)
+            if self.lazy_details and removed_ids:
+                with self._details_lock:
+                    for pid in removed_ids:
+                        self._hydrated.pop(pid, None)
+            for pid, data in records.items():
+                if self._writer.is_pending(pid):
+                    continue
+                old_product = self.products.get(pid)
+                if old_product is not None:
+                    if self.lazy_details:
+                        # 描述和图片发布后不会再修改，只比较常驻字段，不逐个读取存储
+                        if old_product.same_listing(Product.from_dict(data)):
+                            continue
+                    elif old_product.to_dict() == data:
+                        continue
+                product = Product.from_dict(data)
+                if self.lazy_details:
+                    # 记录里没有描述和图片，放入之前先换成按需读取
+                    with self._details_lock:
+                        self._hydrated.pop(pid, None)
+                        self._unload_details(product)
+                self._put_product(product)
+                self.id_allocator.observe(pid)
+            self.generation += 1
+    
+    def publish_catalog(self):
+        """把当前全部商品发布到 catalog_file"""
+        publish_catalog(self.catalog_file, self._snapshot_records())
+    
+    def _snapshot_records(self) -> Dict[str, Dict]:
+        if self.lazy_details:
+            # 逐个序列化会把全部商品的详情读进内存，直接取存储中的记录；
+            # 尚未写出的修改写出后会再发布一次
+            return dict(self.storage.iter_records())
+        # 可能在后台线程中调用，持有读锁保证得到的是某一时刻完整的数据；
+        # 默认模式下的锁是空操作，先复制字典，主线程同时增删商品时遍历也不会出错
+        with self._rw_lock.read_locked():
+            products = dict(self.products)
+        return {pid: product.to_dict() for pid, product in products.items()}
+    
+    def _index_product(self, product: Product, ordered: bool = True):
+        """ordered 为 False 时不加入价格和时间索引，由调用方批量加入"""
+        if not self._memory_indexes:
+            return
+        pid = product.product_id
+        self.keyword_index.add(pid, (product.title,))
+        self.status_index.add(product.status, pid)
+        self.category_index.add(product.category, pid)
+        self.campus_index.add(product.campus, pid)
+        self.seller_index.add(product.seller_id, pid)
+        if ordered and product.status == ProductStatus.ON_SALE:
+            self._index_on_sale(product)
+    
+    def _unindex_product(self, product: Product):
+        if not self._memory_indexes:
+            return
+        pid = product.product_id
+        self.keyword_index.remove(pid)
+        self.status_index.remove(product.status, pid)
+        self.category_index.remove(product.category, pid)
+        self.campus_index.remove(product.campus, pid)
+        self.seller_index.remove(product.seller_id, pid)
+        if product.status == ProductStatus.ON_SALE:
+            self._unindex_on_sale(product)
+    
+    def _index_on_sale(self, product: Product):
+        self.price_index.add(product.price, product.product_id)
+        self.time_index.add(product._create_time, product.product_id)
+    
+    def _unindex_on_sale(self, product: Product):
+        self.price_index.remove(product.price, product.product_id)
+        self.time_index.remove(product._create_time, product.product_id)
+    
+    def _set_status(self, product: Product, status: ProductStatus, kind: str = EVENT_STATUS_CHANGED):
+        pid = product.product_id
+        old_status = product.status
+        if self._memory_indexes:
+            if old_status == ProductStatus.ON_SALE:
+                self._unindex_on_sale(product)
+            self.status_index.remove(old_status, pid)
+            self.status_index.add(status, pid)
+            if status == ProductStatus.ON_SALE:
+                self._index_on_sale(product)
+        product.status = status
+        self.generation += 1
+        self._record_event(kind, pid, status, old_status)
+    
+    def _put_product(self, product: Product):
+        old_product = self.products.get(product.product_id)
+        if old_product is not None:
+            self._unindex_product(old_product)
+        self.products[product.product_id] = product
+        self._index_product(product)
+        self.generation += 1
+        if old_product is None:
+            self._record_event(EVENT_ADDED, product.product_id, product.status)
+        else:
+            self._record_event(EVENT_UPDATED, product.product_id, product.status, old_product.status)
+    
+    def _record_event(self, kind: str, product_id: str, status: Optional[ProductStatus],
+                      old_status: Optional[ProductStatus] = None):
+        """在修改数据时调用，事件在修改完成后由 _dispatch_events 统一通知"""
+        with self._events_lock:
+            self.change_seq += 1
+            event = ProductEvent(self.change_seq, kind, product_id, status, old_status)
+            self._change_log.append(event)
+            self._undispatched.append(event)
+    
+    def _dispatch_events(self):
+        # 其他线程（如延迟写入的计时线程）产生的事件留给所属线程下次调用时通知；
+        # 没有订阅者时直接丢弃，不让事件无限累积
+        if self._subscribers and threading.get_ident() != self._owner_thread:
+            return
+        with self._events_lock:
+            events, self._undispatched = self._undispatched, []
+        if not events:
+            return
+        alive = []
+        for ref in list(self._subscribers):
+            callback = ref()
+            if callback is not None:
+                # 一个订阅者出错不影响其他订阅者，也不影响已经完成的修改
+                try:
+                    callback(events)
+                except Exception:
+                    logger.exception("商品变更订阅者处理事件失败: %r", callback)
+                alive.append(ref)
+        self._subscribers = alive
+    
+    def subscribe(self, callback: Callable[[List[ProductEvent]], None]):
+        """订阅商品变更，每批修改完成后以事件列表调用一次
+
+        回调只在创建管理器的线程中调用：该线程上的修改完成后立即通知，其他线程产生的
+        事件在该线程下一次修改或调用 reload_if_changed 时通知，界面定时轮询即可收到。
+        绑定方法以弱引用保存，对象被回收后自动取消订阅。
+        """
+        if isinstance(callback, types.MethodType):
+            self._subscribers.append(weakref.WeakMethod(callback))
+        else:
+            self._subscribers.append(lambda: callback)
+    
+    def unsubscribe(self, callback: Callable[[List[ProductEvent]], None]):
+        self._subscribers = [ref for ref in self._subscribers if ref() not in (None, callback)]
+    
+    def changes_since(self, seq: int) -> Optional[List[ProductEvent]]:
+        """返回序号大于 seq 的事件
+
+        Returns:
+            事件列表；所需的事件已不在保留范围内时返回 None，调用方应整体重新加载
+        """
+        with self._events_lock:
+            if seq >= self.change_seq:
+                return []
+            if not self._change_log or self._change_log[0].seq > seq + 1:
+                return None
+            return [event for event in self._change_log if event.seq > seq]
+    
+    def next_product_id(self) -> str:
+        """分配一个不会与已有商品重复的新ID"""
+        return self.id_allocator.next_id()
+    
+    def add_product(self, product: Product) -> bool:
+        """添加新商品，ID 已存在时不覆盖，返回 False"""
+        return len(self.add_products([product])) == 1
+    
+    def add_products(self, products: Iterable[Product]) -> List[str]:
+        """批量添加商品，全部加入后只持久化一次，ID 已存在的商品被跳过
+
+        Returns:
+            成功添加的商品ID
+        """
+        added = []
+        with self._rw_lock.write_locked():
+            for product in products:
+                if product.product_id in self.products:
+                    logger.warning("商品ID已存在，拒绝覆盖: %s", product.product_id)
+                    continue
+                self._put_product(product)
+                self.id_allocator.observe(product.product_id)
+                added.append(product.product_id)
+        # 先标记写入再通知，订阅者出错也不会让修改漏写
+        if added:
+            self._save_products(added)
+            if self.lazy_details:
+                for pid in added:
+                    self._track_details(self.products[pid])
+        self._dispatch_events()
+        return added
+    
     def get_products_by_status(self, status: ProductStatus) -> List[Product]:
-        return [product for product in self.products.values() if product.status == status]
+        if not self._memory_indexes:
+            return self._select(where={'status': status.value})
+        with self._rw_lock.read_locked():
+            return [self.products[pid] for pid in self.status_index.get(status)]
+    
+    def get_products_by_seller(self, seller_id: str) -> List[Product]:
+        if not self._memory_indexes:
+            return self._select(where={'seller_id': seller_id})
+        with self._rw_lock.read_locked():
+            return [self.products[pid] for pid in self.seller_index.get(seller_id)]
+    
+    def _select(self, **query) -> List[Product]:
+        """在存储中查询，只构造命中的商品；先写出尚未持久化的修改，结果与内存一致"""
+        self._writer.flush()
+        return [Product.from_dict(record) for record in self.storage.select(**query)]
+    
+    def _search_storage(self, keyword: str, category: ProductCategory, campus: str,
+                        min_price: float, max_price: float, sort_by: str,
+                        limit: int, offset: int, cursor_key: tuple) -> List[Product]:
+        """search_products 在支持查询的存储上的实现，筛选条件与 matches_filters 一致"""
+        where = {'status': ProductStatus.ON_SALE.value}
+        if category:
+            where['category'] = category.value
+        if campus:
+            where['campus'] = campus
+        ranges = {}
+        if min_price or max_price:
+            ranges['price'] = (min_price or None, max_price or None)
+        return self._select(where=where, ranges=ranges,
+                            contains=(keyword, ('title', 'description')) if keyword else None,
+                            order_by=('create_time', 'id') if sort_by == "time" else ('price', 'id'),
+                            descending=sort_by != "price_asc", after=cursor_key,
+                            limit=limit, offset=offset)
+    
+    def _plan_candidates(self, category: ProductCategory, campus: str,
+                         min_price: float, max_price: float, sort_by: str, limit: int = None,
+                         cursor_key: tuple = None):
+        """选出代价最小的遍历方式，其余条件由调用方逐个校验
+
+        cursor_key 为 sort_by 排序下的游标键，按同样顺序遍历时直接从游标处开始
+
+        Returns:
+            (候选商品迭代器, 候选已满足的顺序，取值同 SORT_OPTIONS，无序时为 None)
+        """
+        on_sale = self.status_index.get(ProductStatus.ON_SALE)
+        id_sets = [on_sale]
+        if category:
+            id_sets.append(self.category_index.get(category))
+        if campus:
+            id_sets.append(self.campus_index.get(campus))
+        driver = min(id_sets, key=len)
+        
+        if min_price or max_price or sort_by != "time":
+            lo, hi = self.price_index.bounds(min_price, max_price)
+            # 按价格排序时，价格区间即使稍大也值得用来驱动，省掉结果排序
+            threshold = len(driver) * (4 if sort_by != "time" else 1)
+            if hi - lo <= threshold:
+                if cursor_key is not None and sort_by == "price_asc":
+                    lo = max(lo, self.price_index.bisect(cursor_key, right=True))
+                elif cursor_key is not None and sort_by == "price_desc":
+                    hi = min(hi, self.price_index.bisect(cursor_key))
+                ids = self.price_index.ids
+                positions = range(hi - 1, lo - 1, -1) if sort_by == "price_desc" else range(lo, hi)
+                order = "price_desc" if sort_by == "price_desc" else "price_asc"
+                return (self.products[ids[pos]] for pos in positions), order
+        
+        if sort_by == "time":
+            # 按时间顺序遍历全部在售商品，预计命中 limit 条所需的遍历量
+            # 不超过驱动集合大小时，直接走时间索引并支持提前结束
+            expected_scan = len(on_sale) if limit is None else limit * len(on_sale) / max(len(driver), 1)
+            if driver is on_sale or expected_scan <= len(driver):
+                return (self.products[pid] for pid in self.time_index.newest_first(cursor_key)), "time"
+        return (self.products[pid] for pid in driver), None
+    
+    def _title_matches(self, needle: str) -> set:
+        """标题包含关键词（已转小写）的商品ID"""
+        return {pid for pid in self.keyword_index.lookup(needle)
+                if needle in self.products[pid].title.lower()}
+    
+    @staticmethod
+    def matches_filters(product: Product, keyword: str = "", category: ProductCategory = None,
+                        campus: str = "", min_price: float = None, max_price: float = None) -> bool:
+        """商品是否满足搜索的筛选条件（不检查状态），与 search_products 的判断一致"""
+        # 关键词搜索
+        if keyword and keyword.lower() not in product.title.lower() and keyword.lower() not in product.description.lower():
+            return False
+        
+        # 分类筛选
+        if category and product.category != category:
+            return False
+        
+        # 校区筛选
+        if campus and product.campus != campus:
+            return False
+        
+        # 价格筛选
+        if max_price and product.price > max_price:
+            return False
+        if min_price and product.price < min_price:
+            return False
+        return True
     
     def search_products(self, keyword: str = "", category: ProductCategory = None, 
-                       campus: str = "", max_price: float = None) -> List[Product]:
-        results = []
-        for product in self.products.values():
-            if product.status != ProductStatus.ON_SALE:
-                continue
-            
-            # 关键词搜索
-            if keyword and keyword.lower() not in product.title.lower() and keyword.lower() not in product.description.lower():
-                continue
+                       campus: str = "", max_price: float = None,
+                       min_price: float = None, sort_by: str = "time",
+                       limit: int = None, offset: int = 0, cursor: str = None) -> List[Product]:
+        """搜索在售商品
+
+        Args:
+            min_price: 最低价格，为空表示不限
+            max_price: 最高价格，为空表示不限
+            sort_by: "time" 按发布时间倒序，"price_asc"/"price_desc" 按价格升序/降序
+            limit: 最多返回条数，为空表示不限
+            offset: 跳过的条数
+            cursor: encode_cursor 生成的游标，从上一页之后继续
+        """
+        if sort_by not in SORT_OPTIONS:
+            raise ValueError(f"不支持的排序方式: {sort_by}")
+        cursor_key = None
+        if cursor:
+            cursor_sort, cursor_key, cursor_offset = decode_cursor(cursor)
+            if cursor_sort is not None and cursor_sort != sort_by:
+                raise ValueError("分页游标与排序方式不一致")
+            offset += cursor_offset
+        if not self._memory_indexes:
+            return self._search_storage(keyword, category, campus, min_price, max_price, sort_by,
+                                        limit, offset, cursor_key)
+        stop_at = None if limit is None else offset + limit
+        # 持有读锁直到结果列表生成，不会看到修改了一半的索引
+        with self._rw_lock.read_locked():
+            candidates, order = self._plan_candidates(category, campus, min_price, max_price,
+                                                      sort_by, stop_at, cursor_key)
+            # 只有候选已按目标顺序排列时才能在凑满 limit 后提前结束
+            ordered = order == sort_by
+            # 标题命中由关键词索引给出，其余候选只需核对描述
+            needle = keyword.lower()
+            title_hits = self._title_matches(needle) if needle else None
+            if sort_by != "time":
+                sort_key = lambda x: PriceIndex.key(x.price, x.product_id)
+            elif cursor_key is None or self.time_index.from_key(cursor_key) is not None:
+                # 在售商品都在时间索引中，按索引的比较方式取键，不必逐个还原时间字符串
+                index_key = self.time_index.index_key
+                sort_key = lambda x: index_key(x._create_time, x.product_id)
+                if cursor_key is not None:
+                    cursor_key = self.time_index.from_key(cursor_key)
+            else:
+                # 游标中的时间无法压缩为整数，退回按规范键比较
+                sort_key = lambda x: TimeIndex.key(x.create_time, x.product_id)
             
-            # 分类筛选
-            if category and product.category != category:
-                continue
+            results = []
+            for product in candidates:
+                if product.status != ProductStatus.ON_SALE:
+                    continue
+                
+                if not self.matches_filters(product, "", category, campus, min_price, max_price):
+                    continue
+                
+                if (title_hits is not None and product.product_id not in title_hits
+                        and needle not in product.description.lower()):
+                    continue
             
-            # 校区筛选
-            if campus and product.campus != campus:
-                continue
+                # 游标之前的商品属于已返回的页
+                if cursor_key is not None and not past_cursor(sort_by, sort_key(product), cursor_key):
+                    continue
             
-            # 价格筛选
-            if max_price and product.price > max_price:
-                continue
+                results.append(product)
+                if ordered and stop_at is not None and len(results) >= stop_at:
+                    break
             
-            results.append(product)
-        
-        return sorted(results, key=lambda x: x.create_time, reverse=True)
+            if not ordered:
+                results.sort(key=sort_key, reverse=sort_by != "price_asc")
+            return results[offset:stop_at]
     
     def approve_product(self, product_id: str) -> bool:
-        if product_id in self.products:
-            self.products[product_id].status = ProductStatus.ON_SALE
-            self._save_products()
-            return True
-        return False
\ No newline at end of file
+        return len(self.approve_products([product_id])) == 1
+    
+    def approve_products(self, product_ids: Iterable[str]) -> List[str]:
+        """批量审核通过，全部修改后只持久化一次
+
+        Returns:
+            审核通过的商品ID，不存在的ID被跳过
+        """
+        approved = []
+        with self._rw_lock.write_locked():
+            for product_id in product_ids:
+                product = self.products.get(product_id)
+                if product is not None:
+                    self._set_status(product, ProductStatus.ON_SALE, EVENT_APPROVED)
+                    approved.append(product_id)
+        if approved:
+            self._save_products(approved)
+        self._dispatch_events()
+        return approved
\ No newline at end of file
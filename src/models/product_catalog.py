@@ -0,0 +1,169 @@
+"""
+只读商品目录
+供同一台机器上的多个展示终端使用：商品数据来自写入方发布的内存映射目录文件，
+查询时直接在映射上筛选，只为返回的商品构造 Product 对象。写入方重新发布后，
+下一次查询自动切换到新文件。
+
+用法:
+    写入方: ProductManager(catalog_file=path)，保存后在后台发布目录，catalog_delay 内的多次保存只发布一次
+    只读方: register_managers(product_manager=CatalogProductManager(path))
+"""
+
+import os
+from typing import Iterator, List, Mapping, Optional
+
+from src.models.product import SORT_OPTIONS, Product, ProductCategory, ProductStatus, decode_cursor
+from src.storage.mmap_catalog import MmapCatalog
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 筛选时需要解码的字段，标题和描述只在其余条件都满足后才解码
+_FILTER_FIELDS = ('status', 'category', 'campus', 'price')
+
+
+class _CatalogProducts(Mapping):
+    """按商品ID访问目录的只读映射，每次访问构造新的 Product"""
+
+    def __init__(self, catalog: MmapCatalog):
+        self._catalog = catalog
+
+    def __getitem__(self, product_id: str) -> Product:
+        record = self._catalog.get(product_id)
+        if record is None:
+            raise KeyError(product_id)
+        return Product.from_dict(record)
+
+    def __contains__(self, product_id) -> bool:
+        return self._catalog.find(product_id) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return self._catalog.keys()
+
+    def __len__(self) -> int:
+        return len(self._catalog)
+
+
+class CatalogProductManager:
+    """与 ProductManager 查询接口一致的只读商品管理器"""
+
+    def __init__(self, catalog_file: str = None):
+        if catalog_file is None:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            catalog_file = os.path.join(current_dir, '..', '..', 'data', 'products.catalog')
+        self.catalog_file = catalog_file
+        self.catalog = MmapCatalog(catalog_file)
+        self.products = _CatalogProducts(self.catalog)
+        logger.info("已映射商品目录 %s，共 %d 个商品", catalog_file, len(self.catalog))
+
+    def refresh(self) -> bool:
+        """写入方发布了新目录时重新映射，返回是否有变化"""
+        try:
+            changed = self.catalog.reload_if_changed()
+        except ValueError as e:
+            logger.warning("商品目录无效，继续使用当前数据: %s", e)
+            return False
+        if changed:
+            logger.info("商品目录已更新，共 %d 个商品", len(self.catalog))
+        return changed
+
+    def reload_if_changed(self) -> bool:
+        """与 ProductManager 一致的轮询接口"""
+        return self.refresh()
+
+    @property
+    def generation(self) -> int:
+        # 查询结果缓存先读取版本号，借此检查目录是否已重新发布
+        self.refresh()
+        return self.catalog.version
+
+    def next_product_id(self) -> Optional[str]:
+        """只读目录不分配ID，返回 None，随后的 add_product 同样会被拒绝"""
+        logger.warning("只读商品目录不能分配商品ID")
+        return None
+
+    def add_product(self, product: Product) -> bool:
+        logger.warning("只读商品目录不能添加商品: %s", product.product_id)
+        return False
+
+    def add_products(self, products) -> List[str]:
+        logger.warning("只读商品目录不能添加商品")
+        return []
+
+    def approve_product(self, product_id: str) -> bool:
+        logger.warning("只读商品目录不能审核商品: %s", product_id)
+        return False
+
+    def approve_products(self, product_ids) -> List[str]:
+        logger.warning("只读商品目录不能审核商品")
+        return []
+
+    def subscribe(self, callback):
+        """只读目录没有变更事件，新发布的目录在下一次查询时自动生效"""
+
+    def unsubscribe(self, callback):
+        pass
+
+    def _matching(self, field: str, value: str) -> List[Product]:
+        self.refresh()
+        return [Product.from_dict(self.catalog.record(index))
+                for index, record in self.catalog.scan((field,)) if record[field] == value]
+
+    def get_products_by_status(self, status: ProductStatus) -> List[Product]:
+        return self._matching('status', status.value)
+
+    def get_products_by_seller(self, seller_id: str) -> List[Product]:
+        return self._matching('seller_id', seller_id)
+
+    def search_products(self, keyword: str = "", category: ProductCategory = None,
+                        campus: str = "", max_price: float = None,
+                        min_price: float = None, sort_by: str = "time",
+                        limit: int = None, offset: int = 0, cursor: str = None) -> List[Product]:
+        """搜索在售商品，参数与 ProductManager.search_products 相同"""
+        if sort_by not in SORT_OPTIONS:
+            raise ValueError(f"不支持的排序方式: {sort_by}")
+        cursor_key = None
+        if cursor:
+            cursor_sort, cursor_key, cursor_offset = decode_cursor(cursor)
+            if cursor_sort is not None and cursor_sort != sort_by:
+                raise ValueError("分页游标与排序方式不一致")
+            offset += cursor_offset
+        self.refresh()
+
+        # 按排序表顺序读取，凑够 offset + limit 条即停止，不必解码全部记录
+        order = "time" if sort_by == "time" else "price"
+        descending = sort_by != "price_asc"
+        lo, hi = 0, len(self.catalog)
+        if cursor_key is not None:
+            if descending:
+                hi = self.catalog.bisect(order, cursor_key)
+            else:
+                lo = self.catalog.bisect(order, cursor_key, right=True)
+        if order == "price" and min_price:
+            lo = max(lo, self.catalog.bisect(order, (min_price,)))
+
+        keyword = keyword.lower()
+        stop_at = None if limit is None else offset + limit
+        matches = []
+        for index in self.catalog.ordered(order, lo, hi, reverse=descending):
+            record = self.catalog.record(index, _FILTER_FIELDS)
+            if max_price and record['price'] > max_price:
+                if sort_by == "price_asc":
+                    break
+                continue
+            if min_price and record['price'] < min_price:
+                continue
+            if record['status'] != ProductStatus.ON_SALE.value:
+                continue
+            if category and record['category'] != category.value:
+                continue
+            if campus and record['campus'] != campus:
+                continue
+            if keyword:
+                text = self.catalog.record(index, ('title', 'description'))
+                if keyword not in text['title'].lower() and keyword not in text['description'].lower():
+                    continue
+            matches.append(index)
+            if stop_at is not None and len(matches) >= stop_at:
+                break
+        return [Product.from_dict(self.catalog.record(index)) for index in matches[offset:]]
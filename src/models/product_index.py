@@ -0,0 +1,270 @@
+"""
+商品索引模块
+为 ProductManager 提供增量维护的内存索引
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from src.utils.timestamps import pack_timestamp, unpack_timestamp
+
+
+class NGramIndex:
+    """字符 n-gram 倒排索引
+
+    商品标题多为不含空格的中文，无法按词切分，因此按字符切出长度为 1..n 的
+    片段建立倒排表。关键词的所有片段都出现的文档才可能包含该关键词，
+    返回的候选集合仍需调用方做一次子串校验。
+
+    为控制常驻内存，片段按哈希值分到固定数量的桶里，不保存片段字符串本身；
+    每个桶是一个按行号递增的整数数组，文档ID只在行表中保存一份。哈希冲突
+    只会让候选变多，不影响正确性。删除只把行标记为空，空行过多时整体压缩。
+    """
+
+    def __init__(self, n: int = 2, buckets: int = 1 << 14):
+        self.n = n
+        self._mask = buckets - 1
+        if buckets & self._mask:
+            raise ValueError("桶数量必须是 2 的幂")
+        self._buckets: List[Optional[array]] = [None] * buckets
+        # 行号 -> 文档ID，已删除的行为 None
+        self._docs: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _slots(self, texts: Iterable[str]) -> Set[int]:
+        """文本所有片段所在的桶，不同片段可能落入同一个桶"""
+        mask = self._mask
+        slots = set()
+        for text in texts:
+            text = text.lower()
+            # 每个字段单独切分，避免跨字段拼出不存在的片段
+            slots.update(hash(char) & mask for char in text)
+            for size in range(2, self.n + 1):
+                slots.update(hash(text[i:i + size]) & mask for i in range(len(text) - size + 1))
+        return slots
+
+    def add(self, doc_id: str, texts: Iterable[str]):
+        """加入文档，同一文档再次加入时替换原内容"""
+        if doc_id in self._rows:
+            self.remove(doc_id)
+        row = len(self._docs)
+        self._docs.append(doc_id)
+        self._rows[doc_id] = row
+        buckets = self._buckets
+        for slot in self._slots(texts):
+            bucket = buckets[slot]
+            if bucket is None:
+                bucket = buckets[slot] = array('I')
+            bucket.append(row)
+
+    def remove(self, doc_id: str):
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return
+        self._docs[row] = None
+        dead = len(self._docs) - len(self._rows)
+        if dead > 1024 and dead > len(self._rows):
+            self._compact()
+
+    def _compact(self):
+        """去掉已删除的行并重新编号，各桶保持递增顺序"""
+        renumber = {}
+        docs = []
+        for row, doc_id in enumerate(self._docs):
+            if doc_id is not None:
+                renumber[row] = len(docs)
+                docs.append(doc_id)
+        for slot, bucket in enumerate(self._buckets):
+            if bucket is not None:
+                rows = array('I', (renumber[row] for row in bucket if row in renumber))
+                self._buckets[slot] = rows or None
+        self._docs = docs
+        self._rows = {doc_id: row for row, doc_id in enumerate(docs)}
+
+    def lookup(self, keyword: str) -> Optional[Set[str]]:
+        """返回可能包含关键词的文档ID集合，空关键词返回 None 表示不过滤"""
+        keyword = keyword.lower()
+        if not keyword:
+            return None
+        if len(keyword) <= self.n:
+            grams = {keyword}
+        else:
+            grams = {keyword[i:i + self.n] for i in range(len(keyword) - self.n + 1)}
+
+        # 从最短的倒排表开始求交集
+        postings = []
+        for slot in {hash(gram) & self._mask for gram in grams}:
+            bucket = self._buckets[slot]
+            if not bucket:
+                return set()
+            postings.append(bucket)
+        postings.sort(key=len)
+        rows = set(postings[0])
+        for posting in postings[1:]:
+            rows.intersection_update(posting)
+            if not rows:
+                break
+        docs = self._docs
+        return {docs[row] for row in rows if docs[row] is not None}
+
+
+class AttributeIndex:
+    """等值属性的二级索引：属性值 -> 商品ID集合
+
+    集合用值为 None 的字典表示，增删都是 O(1)，同时保持插入顺序。
+    """
+
+    def __init__(self):
+        self.buckets: Dict[object, Dict[str, None]] = {}
+
+    def add(self, value, doc_id: str):
+        self.buckets.setdefault(value, {})[doc_id] = None
+
+    def remove(self, value, doc_id: str):
+        bucket = self.buckets.get(value)
+        if bucket is not None:
+            bucket.pop(doc_id, None)
+            if not bucket:
+                del self.buckets[value]
+
+    def get(self, value) -> Dict[str, None]:
+        return self.buckets.get(value, {})
+
+
+class PriceIndex:
+    """按价格排序的索引
+
+    prices 与 ids 是两个平行的有序数组，用二分查找定位价格区间，
+    同价商品按商品ID排列，与 TimeIndex 一样保证顺序确定。
+    """
+
+    def __init__(self):
+        self.prices: List[float] = []
+        self.ids: List[str] = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def key(price: float, doc_id: str) -> Tuple[float, str]:
+        return (price, doc_id)
+
+    def add(self, price: float, doc_id: str):
+        lo = bisect_left(self.prices, price)
+        hi = bisect_right(self.prices, price)
+        pos = bisect_left(self.ids, doc_id, lo, hi)
+        self.prices.insert(pos, price)
+        self.ids.insert(pos, doc_id)
+
+    def extend(self, entries: Iterable[Tuple[float, str]]):
+        """批量加入 (价格, ID)，整体排序一次，用于启动时建立索引"""
+        merged = sorted([*zip(self.prices, self.ids), *entries])
+        self.prices = [price for price, _ in merged]
+        self.ids = [doc_id for _, doc_id in merged]
+
+    def bisect(self, key: Tuple[float, str], right: bool = False) -> int:
+        """(价格, ID) 键在数组中的插入位置，right 为 True 时排在相等的键之后"""
+        price, doc_id = key
+        lo = bisect_left(self.prices, price)
+        hi = bisect_right(self.prices, price)
+        return (bisect_right if right else bisect_left)(self.ids, doc_id, lo, hi)
+
+    def remove(self, price: float, doc_id: str):
+        lo = bisect_left(self.prices, price)
+        hi = bisect_right(self.prices, price)
+        pos = bisect_left(self.ids, doc_id, lo, hi)
+        if pos < hi and self.ids[pos] == doc_id:
+            del self.prices[pos]
+            del self.ids[pos]
+
+    def range(self, min_price: float = None, max_price: float = None) -> List[str]:
+        """返回价格落在 [min_price, max_price] 内的ID，按价格升序"""
+        lo, hi = self.bounds(min_price, max_price)
+        return self.ids[lo:hi]
+
+    def bounds(self, min_price: float = None, max_price: float = None):
+        """返回价格区间在数组中的下标范围 [lo, hi)"""
+        lo = bisect_left(self.prices, min_price) if min_price else 0
+        hi = bisect_right(self.prices, max_price) if max_price else len(self.prices)
+        return lo, max(lo, hi)
+
+
+class TimeIndex:
+    """按发布时间排序的索引
+
+    keys 按 (时间, product_id) 升序保存，新发布的商品通常直接追加在末尾，
+    从末尾向前遍历即得到从新到旧的顺序，无需每次查询都排序。
+
+    时间以 pack_timestamp 的结果传入。全部是整数秒时直接比较整数；一旦加入
+    无法压缩的时间（旧格式或空值），整个索引改为比较还原后的字符串。两种方式
+    得到的顺序都与 key() 定义的规范顺序一致，规范时间的整数顺序就是字符串顺序。
+    """
+
+    def __init__(self):
+        self.keys: List[Tuple[Union[int, str], str]] = []
+        # 全部时间都是整数秒时为 True
+        self.packed = True
+
+    def __len__(self):
+        return len(self.keys)
+
+    @staticmethod
+    def key(create_time: str, doc_id: str) -> Tuple[str, str]:
+        """规范的排序键，分页游标和只读目录按它比较"""
+        return (create_time or "", doc_id)
+
+    def index_key(self, packed_time: Union[int, str, None], doc_id: str) -> tuple:
+        """按索引当前的比较方式生成键，packed_time 为 pack_timestamp 的结果"""
+        if self.packed:
+            return (packed_time, doc_id)
+        return (unpack_timestamp(packed_time) or "", doc_id)
+
+    def from_key(self, key: Tuple[str, str]) -> Optional[tuple]:
+        """把规范键换算为索引当前的比较方式，无法换算时返回 None"""
+        if not self.packed:
+            return key
+        packed = pack_timestamp(key[0])
+        return (packed, key[1]) if isinstance(packed, int) else None
+
+    def _accept(self, packed_time):
+        if self.packed and not isinstance(packed_time, int):
+            # 还原不改变相对顺序，无需重新排序
+            self.keys = [(unpack_timestamp(packed), doc_id) for packed, doc_id in self.keys]
+            self.packed = False
+
+    def add(self, packed_time: Union[int, str, None], doc_id: str):
+        self._accept(packed_time)
+        insort(self.keys, self.index_key(packed_time, doc_id))
+
+    def extend(self, entries: Iterable[Tuple[Union[int, str, None], str]]):
+        """批量加入 (压缩后的时间, ID)，整体排序一次，用于启动时建立索引"""
+        entries = list(entries)
+        for packed_time, _ in entries:
+            self._accept(packed_time)
+        self.keys.extend(self.index_key(packed_time, doc_id) for packed_time, doc_id in entries)
+        self.keys.sort()
+
+    def remove(self, packed_time: Union[int, str, None], doc_id: str):
+        if self.packed and not isinstance(packed_time, int):
+            return
+        key = self.index_key(packed_time, doc_id)
+        pos = bisect_left(self.keys, key)
+        if pos < len(self.keys) and self.keys[pos] == key:
+            del self.keys[pos]
+
+    def newest_first(self, before: Tuple[str, str] = None) -> Iterator[str]:
+        """从新到旧遍历，指定规范键 before 时只返回排在该键之后（更旧）的ID"""
+        if before is None:
+            start = len(self.keys)
+        else:
+            index_before = self.from_key(before)
+            if index_before is not None:
+                start = bisect_left(self.keys, index_before)
+            else:
+                start = bisect_left(self.keys, before, key=lambda key: (unpack_timestamp(key[0]), key[1]))
+        for pos in range(start - 1, -1, -1):
+            yield self.keys[pos][1]
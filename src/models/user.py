@@ -1,21 +1,42 @@
 import json
 import os
+import sys
+import weakref
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, List
+from src.storage.base import StorageBackend
+from src.storage.factory import create_storage
+from src.storage.id_allocator import IdAllocator, default_seq_file, max_numeric_id
+from src.storage.sqlite_storage import USER_COLUMNS
+from src.utils.logger import get_logger
+from src.utils.timestamps import TIME_FORMAT, pack_timestamp, unpack_timestamp
+
+logger = get_logger(__name__)
 
 class User:
+    __slots__ = ('user_id', 'username', 'password', 'email', 'campus', 'credit_score',
+                 'user_type', '_registration_date', 'status')
+    
     def __init__(self, user_id: str, username: str, password: str, email: str, 
                  campus: str, credit_score: int = 100, user_type: str = "student"):
         self.user_id = user_id
         self.username = username
         self.password = password
         self.email = email
-        self.campus = campus
+        self.campus = sys.intern(campus) if isinstance(campus, str) else campus
         self.credit_score = credit_score
-        self.user_type = user_type  # student, teacher, admin
-        self.registration_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.user_type = sys.intern(user_type) if isinstance(user_type, str) else user_type  # student, teacher, admin
+        self.registration_date = datetime.now().strftime(TIME_FORMAT)
         self.status = "active"
     
+    @property
+    def registration_date(self) -> str:
+        return unpack_timestamp(self._registration_date)
+    
+    @registration_date.setter
+    def registration_date(self, value: str):
+        self._registration_date = pack_timestamp(value)
+    
     def to_dict(self) -> Dict:
         return {
             'user_id': self.user_id,
@@ -31,17 +52,20 @@ class User:
     
     @classmethod
     def from_dict(cls, data: Dict):
-        user = cls(
-            data['user_id'],
-            data['username'],
-            data['password'],
-            data['email'],
-            data['campus'],
-            data.get('credit_score', 100),
-            data.get('user_type', 'student')
-        )
+        # 不经过 __init__，加载时不必为每条记录生成一次当前时间
+        user = cls.__new__(cls)
+        user.user_id = data['user_id']
+        user.username = data['username']
+        user.password = data['password']
+        user.email = data['email']
+        campus = data['campus']
+        user.campus = sys.intern(campus) if isinstance(campus, str) else campus
+        user.credit_score = data.get('credit_score', 100)
+        user_type = data.get('user_type', 'student')
+        user.user_type = sys.intern(user_type) if isinstance(user_type, str) else user_type
         user.registration_date = data.get('registration_date')
-        user.status = data.get('status', 'active')
+        status = data.get('status', 'active')
+        user.status = sys.intern(status) if isinstance(status, str) else status
         return user
     
     def get_user_type_display(self) -> str:
@@ -54,54 +78,164 @@ class User:
         return type_map.get(self.user_type, '用户')
 
 class UserManager:
-    def __init__(self, data_file: str = None):
+    def __init__(self, data_file: str = None, storage_mode: str = "json",
+                 storage: StorageBackend = None, binary_snapshot: bool = False,
+                 id_allocator: IdAllocator = None):
+        """
+        Args:
+            storage_mode: 存储模式，见 create_storage
+            storage: 直接指定存储后端，优先于 storage_mode
+            binary_snapshot: json 模式下同时维护二进制快照，启动时优先读取
+            id_allocator: 新用户ID的分配器，默认使用与数据文件同名的 .seq 序列文件
+        """
         # 使用绝对路径确保能找到数据文件
         if data_file is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             data_file = os.path.join(current_dir, '..', '..', 'data', 'users.json')
         self.data_file = data_file
-        print(f"用户数据文件路径: {self.data_file}")
+        if storage is None:
+            storage = create_storage(storage_mode, data_file, 'users', USER_COLUMNS, 'user_id',
+                                     binary_snapshot=binary_snapshot)
+        self.storage = storage
+        logger.debug("用户数据文件路径: %s", self.data_file)
+        self._data_signature = self.storage.data_signature()
         self.users = self._load_users()
+        if id_allocator is None:
+            id_allocator = IdAllocator(default_seq_file(data_file))
+        id_allocator.floor = max(id_allocator.floor, max_numeric_id(self.users))
+        self.id_allocator = id_allocator
+        # 用户名/邮箱 -> 用户ID 的哈希索引，登录和注册查重都是 O(1)
+        self._rebuild_indexes()
+        self._listeners = []
+    
+    def add_listener(self, callback: Callable[[str], None]):
+        """注册用户变更回调，参数为变更的用户ID
+
+        绑定方法以弱引用保存，监听对象被回收后自动失效。
+        """
+        if hasattr(callback, '__self__'):
+            self._listeners.append(weakref.WeakMethod(callback))
+        else:
+            self._listeners.append(lambda: callback)
+    
+    def _notify_changed(self, user_id: str):
+        alive = []
+        for ref in self._listeners:
+            callback = ref()
+            if callback is not None:
+                callback(user_id)
+                alive.append(ref)
+        self._listeners = alive
     
     def _load_users(self) -> Dict[str, User]:
         try:
-            print(f"正在加载用户数据从: {self.data_file}")
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                print(f"成功加载 {len(data)} 个用户")
-                return {user_id: User.from_dict(user_data) for user_id, user_data in data.items()}
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"加载用户数据失败: {e}")
-            return {}
-    
-    def _save_users(self):
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump({uid: user.to_dict() for uid, user in self.users.items()}, f, indent=2, ensure_ascii=False)
+            logger.debug("正在加载用户数据从: %s", self.data_file)
+            users = {}
+            for user_id, user_data in self.storage.iter_records():
+                users[user_id] = User.from_dict(user_data)
+            logger.info("成功加载 %d 个用户", len(users))
+            return users
+        except FileNotFoundError as e:
+            logger.warning("加载用户数据失败: %s", e)
+        except json.JSONDecodeError as e:
+            backup = self.storage.backup_corrupt()
+            logger.error("用户数据文件已损坏，已备份到 %s: %s", backup, e)
+        return {}
     
-    def register_user(self, username: str, password: str, email: str, campus: str, user_type: str = "student") -> bool:
-        # 检查用户是否已存在
+    def _merge_if_changed(self):
+        """调用方需持有排他文件锁"""
+        if self.storage.data_signature() != self._data_signature:
+            # 其他进程在上次读写之后写入过，先合并再写回，避免整体覆盖
+            self._merge_records(self.storage.iter_records())
+    
+    def _write_users(self, user_ids: List[str]):
+        """调用方需持有排他文件锁"""
+        changes = {uid: self.users[uid].to_dict() for uid in user_ids}
+        self.storage.save(changes, self._snapshot_records)
+        self._data_signature = self.storage.data_signature()
+    
+    def reload_if_changed(self) -> bool:
+        """其他进程写入了新数据时重新读取
+
+        Returns:
+            数据是否有变化
+        """
+        with self.storage.locked(shared=True):
+            signature = self.storage.data_signature()
+            if signature == self._data_signature:
+                return False
+            try:
+                self._merge_records(self.storage.iter_records())
+            except json.JSONDecodeError as e:
+                logger.warning("重新读取用户数据失败，继续使用内存中的数据: %s", e)
+                return False
+            self._data_signature = signature
+        logger.info("检测到其他进程更新了用户数据，已重新读取")
+        return True
+    
+    def _merge_records(self, records):
+        records = dict(records)
+        # 修改都在排他锁内立即写入，内存中没有未写出的用户，以存储为准
+        changed = [uid for uid in self.users if uid not in records]
+        for uid in changed:
+            del self.users[uid]
+        for uid, data in records.items():
+            user = self.users.get(uid)
+            if user is not None and user.to_dict() == data:
+                continue
+            self.users[uid] = User.from_dict(data)
+            self.id_allocator.observe(uid)
+            changed.append(uid)
+        if changed:
+            self._rebuild_indexes()
+            for uid in changed:
+                self._notify_changed(uid)
+    
+    def _snapshot_records(self) -> Dict[str, Dict]:
+        users = dict(self.users)
+        return {uid: user.to_dict() for uid, user in users.items()}
+    
+    def _rebuild_indexes(self):
+        # 用户名/邮箱 -> 用户ID 的哈希索引，登录和注册查重都是 O(1)
+        self.username_index: Dict[str, str] = {}
+        self.email_index: Dict[str, str] = {}
         for user in self.users.values():
-            if user.username == username or user.email == email:
+            self._index_user(user)
+    
+    def _index_user(self, user: User):
+        # 历史数据中若有重名，保留最先出现的用户，与原先顺序查找的结果一致
+        self.username_index.setdefault(user.username, user.user_id)
+        self.email_index.setdefault(user.email, user.user_id)
+    
+    def get_user_by_username(self, username: str) -> User:
+        user_id = self.username_index.get(username)
+        return self.users.get(user_id) if user_id is not None else None
+    
+    def register_user(self, username: str, password: str, email: str, campus: str, user_type: str = "student") -> bool:
+        # 查重和写入在同一个排他锁内完成（sqlite 为 BEGIN IMMEDIATE 事务），
+        # 其他进程不会在两者之间注册同名用户
+        with self.storage.locked():
+            # 先读入其他进程新注册的用户再检查是否已存在
+            self._merge_if_changed()
+            if username in self.username_index or email in self.email_index:
                 return False
-        
-        user_id = str(len(self.users) + 1)
-        new_user = User(user_id, username, password, email, campus, user_type=user_type)
-        self.users[user_id] = new_user
-        self._save_users()
+            
+            user_id = self.id_allocator.next_id()
+            new_user = User(user_id, username, password, email, campus, user_type=user_type)
+            self.users[user_id] = new_user
+            self._index_user(new_user)
+            self._write_users([user_id])
+        self._notify_changed(user_id)
         return True
     
     def authenticate_user(self, username: str, password: str) -> User:
-        print(f"尝试认证用户: {username}")
-        print(f"当前用户数量: {len(self.users)}")
-        for user_id, user in self.users.items():
-            print(f"用户 {user_id}: {user.username} ({user.user_type})")
+        logger.debug("尝试认证用户: %s (当前用户数量: %d)", username, len(self.users))
         
-        for user in self.users.values():
-            if user.username == username and user.password == password and user.status == "active":
-                print(f"用户认证成功: {username} ({user.user_type})")
-                return user
-        print(f"用户认证失败: {username}")
+        user = self.get_user_by_username(username)
+        if user is not None and user.password == password and user.status == "active":
+            logger.info("用户认证成功: %s (%s)", username, user.user_type)
+            return user
+        logger.info("用户认证失败: %s", username)
         return None
     
     def get_user_by_id(self, user_id: str) -> User:
@@ -1,9 +1,10 @@
 from src.models.user import UserManager
+from src.services.registry import get_user_manager
 from src.utils.validators import validate_email, validate_password, validate_username
 
 class AuthService:
-    def __init__(self):
-        self.user_manager = UserManager()
+    def __init__(self, user_manager: UserManager = None):
+        self.user_manager = user_manager if user_manager is not None else get_user_manager()
         self.current_user = None
     
     def register(self, username: str, password: str, email: str, campus: str) -> dict:
@@ -1,10 +1,61 @@
-from src.models.product import Product, ProductManager, ProductStatus, ProductCategory
+from collections import OrderedDict
+from src.models.product import Product, ProductManager, ProductStatus, ProductCategory, encode_cursor
+from src.models.product_index import PriceIndex, TimeIndex
 from src.models.user import UserManager
+from src.services.registry import get_product_manager, get_user_manager
 
 class ProductService:
-    def __init__(self):
-        self.product_manager = ProductManager()
-        self.user_manager = UserManager()
+    def __init__(self, product_manager: ProductManager = None, user_manager: UserManager = None,
+                 search_cache_size: int = 128):
+        """
+        Args:
+            search_cache_size: 搜索结果 LRU 缓存的条目数，0 表示不缓存
+        """
+        self.product_manager = product_manager if product_manager is not None else get_product_manager()
+        self.user_manager = user_manager if user_manager is not None else get_user_manager()
+        # 卖家摘要缓存：seller_id -> {seller_name, seller_credit, seller_type}
+        self._seller_cache = {}
+        self._user_generation = 0
+        self.user_manager.add_listener(self._on_user_changed)
+        # 搜索结果缓存：查询条件 -> (数据版本, 结果)
+        self._search_cache = OrderedDict()
+        self.search_cache_size = search_cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def _on_user_changed(self, user_id: str):
+        self._seller_cache.pop(user_id, None)
+        # 缓存的搜索结果里带有卖家信息，一并失效
+        self._user_generation += 1
+    
+    def cache_stats(self) -> dict:
+        """搜索结果缓存的命中统计"""
+        return {"hits": self.cache_hits, "misses": self.cache_misses, "size": len(self._search_cache)}
+    
+    def _seller_summary(self, seller_id: str) -> dict:
+        summary = self._seller_cache.get(seller_id)
+        if summary is None:
+            seller = self.user_manager.get_user_by_id(seller_id)
+            summary = {
+                'seller_name': seller.username if seller else "未知用户",
+                'seller_credit': seller.credit_score if seller else 100,
+                'seller_type': seller.get_user_type_display() if seller else "用户",
+            }
+            self._seller_cache[seller_id] = summary
+        return summary
+    
+    def _enrich_products(self, products, fields=('seller_name', 'seller_credit', 'seller_type')) -> list:
+        """为商品附加卖家信息，每个卖家在一个结果集中只解析一次"""
+        summaries = {seller_id: self._seller_summary(seller_id)
+                     for seller_id in {product.seller_id for product in products}}
+        enriched_products = []
+        for product in products:
+            enriched_product = product.to_dict()
+            summary = summaries[product.seller_id]
+            for field in fields:
+                enriched_product[field] = summary[field]
+            enriched_products.append(enriched_product)
+        return enriched_products
     
     def publish_product(self, title: str, description: str, price: float,
                        category: ProductCategory, seller_id: str, campus: str, condition: str) -> dict:
@@ -12,7 +63,7 @@ class ProductService:
         if not title or not description or price <= 0:
             return {"success": False, "message": "请填写完整的商品信息"}
         
-        product_id = str(len(self.product_manager.products) + 1)
+        product_id = self.product_manager.next_product_id()
         product = Product(product_id, title, description, price, category, seller_id, campus, condition)
         
         if self.product_manager.add_product(product):
@@ -20,64 +71,135 @@ class ProductService:
         else:
             return {"success": False, "message": "商品发布失败"}
     
-    def search_products(self, keyword: str = "", category: str = "", 
-                       campus: str = "", max_price: float = None, 
-                       show_all: bool = True) -> list:
-        """搜索商品
+    def publish_products(self, items: list) -> dict:
+        """批量发布商品，全部校验通过后一次性保存
         Args:
-            show_all: 是否显示所有商品（包括其他用户的）
+            items: 每项为 publish_product 参数组成的字典
         """
-        category_enum = None
+        for item in items:
+            if not item.get('title') or not item.get('description') or item.get('price', 0) <= 0:
+                return {"success": False, "message": "请填写完整的商品信息"}
+        
+        products = []
+        for item in items:
+            products.append(Product(self.product_manager.next_product_id(), item['title'],
+                                    item['description'], item['price'], item['category'],
+                                    item['seller_id'], item['campus'], item.get('condition', "九成新")))
+        
+        added = self.product_manager.add_products(products)
+        if len(added) == len(products):
+            return {"success": True, "message": f"已发布 {len(added)} 件商品，等待审核", "products": products}
+        return {"success": False, "message": "商品发布失败"}
+    
+    @staticmethod
+    def _category_enum(category: str):
         if category:
             try:
-                category_enum = ProductCategory(category)
+                return ProductCategory(category)
             except ValueError:
                 pass
+        return None
+    
+    def search_products(self, keyword: str = "", category: str = "", 
+                       campus: str = "", max_price: float = None, 
+                       show_all: bool = True, min_price: float = None,
+                       sort_by: str = "time", limit: int = None, offset: int = 0,
+                       cursor: str = None) -> list:
+        """搜索商品
+        Args:
+            show_all: 是否显示所有商品（包括其他用户的）
+            min_price: 最低价格
+            sort_by: 排序方式，"time"、"price_asc" 或 "price_desc"
+            limit: 每页条数，为空表示返回全部
+            offset: 跳过的条数
+            cursor: 上一页返回的 next_cursor
+        """
+        category_enum = self._category_enum(category)
+        
+        # 关键词匹配不区分大小写，价格为 0 或空都表示不限
+        key = (keyword.lower(), category_enum, campus, max_price or None, min_price or None,
+               sort_by, limit, offset, cursor)
+        generation = (self.product_manager.generation, self._user_generation)
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            if cached[0] == generation:
+                self._search_cache.move_to_end(key)
+                self.cache_hits += 1
+                return list(cached[1])
+            del self._search_cache[key]
+        self.cache_misses += 1
         
         # 搜索时不过滤卖家，显示所有商品
-        products = self.product_manager.search_products(keyword, category_enum, campus, max_price)
+        products = self.product_manager.search_products(keyword, category_enum, campus, max_price,
+                                                        min_price=min_price, sort_by=sort_by,
+                                                        limit=limit, offset=offset, cursor=cursor)
         
         # 丰富商品信息
-        enriched_products = []
-        for product in products:
-            seller = self.user_manager.get_user_by_id(product.seller_id)
-            enriched_product = product.to_dict()
-            enriched_product['seller_name'] = seller.username if seller else "未知用户"
-            enriched_product['seller_credit'] = seller.credit_score if seller else 100
-            enriched_product['seller_type'] = seller.get_user_type_display() if seller else "用户"
-            enriched_products.append(enriched_product)
-        
-        return enriched_products
+        enriched_products = self._enrich_products(products)
+        if self.search_cache_size > 0:
+            self._search_cache[key] = (generation, enriched_products)
+            if len(self._search_cache) > self.search_cache_size:
+                self._search_cache.popitem(last=False)
+        return list(enriched_products)
+    
+    def search_products_page(self, keyword: str = "", category: str = "",
+                             campus: str = "", max_price: float = None,
+                             min_price: float = None, sort_by: str = "time",
+                             limit: int = 20, cursor: str = None) -> dict:
+        """分页搜索商品
+        Returns:
+            {"products": 当前页商品, "next_cursor": 下一页游标，没有更多时为 None}
+        """
+        products = self.search_products(keyword, category, campus, max_price,
+                                        min_price=min_price, sort_by=sort_by,
+                                        limit=limit, cursor=cursor)
+        # 游标记录最后一个商品的排序键，翻页期间有商品增删也不会跳过或重复
+        next_cursor = encode_cursor(products[-1], sort_by=sort_by) if len(products) == limit else None
+        return {"products": products, "next_cursor": next_cursor}
+    
+    def subscribe_changes(self, callback):
+        """订阅商品变更事件，见 ProductManager.subscribe"""
+        self.product_manager.subscribe(callback)
+    
+    def unsubscribe_changes(self, callback):
+        self.product_manager.unsubscribe(callback)
+    
+    def get_product(self, product_id: str) -> dict:
+        """获取单个商品（附带卖家信息），不存在时返回 None"""
+        product = self.product_manager.products.get(product_id)
+        return self._enrich_products([product])[0] if product is not None else None
+    
+    def product_matches_search(self, product_id: str, keyword: str = "", category: str = "",
+                               campus: str = "", max_price: float = None,
+                               min_price: float = None) -> bool:
+        """商品当前是否会出现在给定条件的搜索结果中"""
+        product = self.product_manager.products.get(product_id)
+        if product is None or product.status != ProductStatus.ON_SALE:
+            return False
+        return ProductManager.matches_filters(product, keyword, self._category_enum(category),
+                                              campus, min_price, max_price)
+    
+    @staticmethod
+    def sort_key(product: dict, sort_by: str = "time"):
+        """商品在搜索结果中的排序键，"price_asc" 按升序，其余按降序排列"""
+        if sort_by == "time":
+            return TimeIndex.key(product['create_time'], product['product_id'])
+        return PriceIndex.key(product['price'], product['product_id'])
     
     def get_pending_products(self) -> list:
         """获取待审核商品"""
         pending_products = self.product_manager.get_products_by_status(ProductStatus.PENDING)
-        enriched_products = []
-        
-        for product in pending_products:
-            seller = self.user_manager.get_user_by_id(product.seller_id)
-            enriched_product = product.to_dict()
-            enriched_product['seller_name'] = seller.username if seller else "未知用户"
-            enriched_product['seller_type'] = seller.get_user_type_display() if seller else "用户"
-            enriched_products.append(enriched_product)
-        
-        return enriched_products
+        return self._enrich_products(pending_products, ('seller_name', 'seller_type'))
     
     def approve_product(self, product_id: str) -> bool:
         """审核通过商品"""
         return self.product_manager.approve_product(product_id)
     
+    def approve_products(self, product_ids: list) -> list:
+        """批量审核通过商品，返回审核通过的商品ID"""
+        return self.product_manager.approve_products(product_ids)
+    
     def get_products_by_seller(self, seller_id: str) -> list:
         """获取指定卖家的商品（用于个人中心）"""
-        products = self.product_manager.products.values()
-        seller_products = [p for p in products if p.seller_id == seller_id]
-        
-        enriched_products = []
-        for product in seller_products:
-            seller = self.user_manager.get_user_by_id(product.seller_id)
-            enriched_product = product.to_dict()
-            enriched_product['seller_name'] = seller.username if seller else "未知用户"
-            enriched_product['seller_type'] = seller.get_user_type_display() if seller else "用户"
-            enriched_products.append(enriched_product)
-        
-        return enriched_products
\ No newline at end of file
+        seller_products = self.product_manager.get_products_by_seller(seller_id)
+        return self._enrich_products(seller_products, ('seller_name', 'seller_type'))
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+数据管理器注册表
+整个进程共享同一份 UserManager / ProductManager，数据只加载一次、只在内存中保留一份
+"""
+
+import threading
+
+from src.models.product import ProductManager
+from src.models.user import UserManager
+
+_lock = threading.Lock()
+_user_manager = None
+_product_manager = None
+
+
+def get_user_manager() -> UserManager:
+    """获取共享的用户管理器，首次调用时创建"""
+    global _user_manager
+    with _lock:
+        if _user_manager is None:
+            _user_manager = UserManager()
+        return _user_manager
+
+
+def get_product_manager() -> ProductManager:
+    """获取共享的商品管理器，首次调用时创建"""
+    global _product_manager
+    with _lock:
+        if _product_manager is None:
+            _product_manager = ProductManager()
+        return _product_manager
+
+
+def register_managers(user_manager: UserManager = None, product_manager: ProductManager = None):
+    """替换共享的管理器，用于指定数据文件或存储模式"""
+    global _user_manager, _product_manager
+    with _lock:
+        if user_manager is not None:
+            _user_manager = user_manager
+        if product_manager is not None:
+            _product_manager = product_manager
+
+
+def reset_registry():
+    """清空注册表，下次获取时重新加载"""
+    global _user_manager, _product_manager
+    with _lock:
+        _user_manager = None
+        _product_manager = None
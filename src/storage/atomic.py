@@ -0,0 +1,72 @@
+"""
+原子写文件
+先写入同目录下的临时文件并落盘，再整体替换目标文件。写到一半崩溃时
+目标文件仍是上一次完整保存的内容，不会留下截断的文件
+"""
+
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import IO, Iterator, Optional
+
+# os.umask 只能在设置的同时读出，导入时读一次，避免运行中临时改动影响其他线程
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _target_mode(path: str) -> int:
+    """替换后文件应有的权限：沿用原文件，新文件按 umask 取默认值"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: Optional[str] = 'utf-8') -> Iterator[IO]:
+    """
+    以原子方式写文件，with 块正常结束后才替换目标文件
+
+    Args:
+        path: 目标文件路径
+        mode: 'w' 文本或 'wb' 二进制
+        encoding: 文本模式下的编码
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # 临时文件名唯一，多个写入方同时保存时不会互相覆盖临时文件
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        # mkstemp 创建的文件权限为 0600，替换后其他用户的只读进程将无法读取
+        os.chmod(tmp_path, _target_mode(path))
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def backup_corrupt_file(path: str) -> Optional[str]:
+    """
+    把无法解析的数据文件改名备份，避免之后的保存覆盖掉可能还能人工恢复的内容
+
+    Returns:
+        备份文件路径，文件不存在时返回 None
+    """
+    if not os.path.exists(path):
+        return None
+    backup_path = f"{path}.corrupt-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    suffix = 1
+    while os.path.exists(backup_path):
+        suffix += 1
+        backup_path = f"{path}.corrupt-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{suffix}"
+    os.replace(path, backup_path)
+    return backup_path
@@ -0,0 +1,88 @@
+"""
+存储后端接口
+管理器在内存中持有对象，通过存储后端以 {key: dict} 的形式读写记录
+"""
+
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from src.storage.file_lock import FileLock
+
+
+class StorageBackend:
+    """记录存储后端基类"""
+
+    # get() 是否能在不读取全部记录的情况下按主键取出一条记录
+    supports_random_access = False
+    # 是否实现 select()，在存储中按索引列筛选、排序和分页
+    supports_queries = False
+    # 多进程共享数据时使用的锁文件，为 None 表示后端自行处理并发（如 sqlite）
+    lock_file: Optional[str] = None
+
+    def load(self) -> Dict[str, Dict]:
+        """读取全部记录"""
+        return dict(self.iter_records())
+
+    def iter_records(self, progress: Callable[[int, int], None] = None) -> Iterator[Tuple[str, Dict]]:
+        """逐条读取记录，支持流式读取的后端不会一次性载入全部数据
+
+        Args:
+            progress: 进度回调，参数为 (已处理量, 总量)，单位由后端决定
+        """
+        return iter(self.load().items())
+
+    def iter_summaries(self, omit: Sequence[str],
+                       progress: Callable[[int, int], None] = None) -> Iterator[Tuple[str, Dict]]:
+        """与 iter_records 相同，但记录中不含 omit 列出的字段，省略的字段之后可用 get 读取；
+        默认实现仍读取完整记录，sqlite 在数据库中去掉这些字段，不必解析它们"""
+        for key, record in self.iter_records(progress):
+            for name in omit:
+                record.pop(name, None)
+            yield key, record
+
+    def save(self, changes: Dict[str, Dict], snapshot: Callable[[], Dict[str, Dict]]):
+        """持久化变更
+
+        Args:
+            changes: 本次变更的记录
+            snapshot: 返回全部记录的回调，只有需要整体重写的后端才会调用，
+                      可能在后台线程中被调用
+        """
+        raise NotImplementedError
+
+    def locked(self, shared: bool = False) -> ContextManager:
+        """获取进程间文件锁，shared 为 True 时为读锁"""
+        if self.lock_file is None:
+            return nullcontext()
+        return FileLock(self.lock_file, shared)
+
+    def data_signature(self) -> Optional[Hashable]:
+        """数据的版本标识，其他进程写入后会变化，用于判断是否需要重新读取
+
+        Returns:
+            不支持变化检测时返回 None
+        """
+        return None
+
+    def backup_corrupt(self) -> Optional[str]:
+        """读取时发现数据文件损坏后调用，把文件改名备份
+
+        Returns:
+            备份文件路径，没有可备份的文件时返回 None
+        """
+        return None
+
+    def get(self, key: str) -> Optional[Dict]:
+        """按主键读取单条记录，默认实现需要读取全部记录"""
+        return self.load().get(key)
+
+    def select(self, where: Dict[str, object] = None, ranges: Dict[str, Tuple] = None,
+               contains: Tuple[str, Sequence[str]] = None, order_by: Sequence[str] = (),
+               descending: bool = False, after: Sequence = None, limit: int = None,
+               offset: int = 0) -> List[Dict]:
+        """按索引列查询记录，只有 supports_queries 为 True 的后端实现，参数见 SQLiteStorage.select"""
+        raise NotImplementedError
+
+    def close(self):
+        """释放后端持有的资源"""
+        pass
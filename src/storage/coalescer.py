@@ -0,0 +1,77 @@
+"""
+写入合并
+短时间内的多次变更（如管理员连续审核几十个商品）只触发一次持久化
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class WriteCoalescer:
+    """收集变更的主键，在延迟窗口结束时一次性写出
+
+    delay 为 0 时每次标记都立即写出，行为与逐条保存相同。
+    延迟写出在后台计时线程中进行，该线程不是守护线程，进程退出前会等它写完。
+    """
+
+    def __init__(self, flush: Callable[[List[str]], None], delay: float = 0.0,
+                 after_flush: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            flush: 实际写出的回调，参数为待写出的主键列表
+            delay: 第一次变更之后等待多少秒再写出
+            after_flush: 写出成功且主键已不再处于待写状态后调用
+        """
+        self._flush = flush
+        self.delay = delay
+        self._after_flush = after_flush
+        # 待写出的主键 -> 最近一次标记的序号
+        self._pending: Dict[str, int] = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        # 同一时间只进行一次写出
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def mark(self, keys: Iterable[str]):
+        """标记需要写出的主键"""
+        with self._lock:
+            for key in keys:
+                self._sequence += 1
+                self._pending[key] = self._sequence
+            if self.delay > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.delay, self.flush)
+                    self._timer.start()
+                return
+        self.flush()
+
+    def is_pending(self, key: str) -> bool:
+        """主键是否有尚未写出的变更"""
+        return key in self._pending
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def flush(self):
+        """立即写出全部待写变更
+
+        写出失败时变更保留为待写状态，异常继续抛出。
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                batch = dict(self._pending)
+            if not batch:
+                return
+            self._flush(list(batch))
+            with self._lock:
+                for key, sequence in batch.items():
+                    # 写出期间再次被标记的主键留待下次写出
+                    if self._pending.get(key) == sequence:
+                        del self._pending[key]
+            if self._after_flush is not None:
+                self._after_flush()
@@ -0,0 +1,42 @@
+"""
+按存储模式创建存储后端
+"""
+
+import os
+from typing import Dict
+
+from src.storage.base import StorageBackend
+from src.storage.journal import JournalStorage
+from src.storage.json_storage import JsonFileStorage, JsonLinesStorage
+from src.storage.sqlite_storage import SQLiteStorage
+
+STORAGE_MODES = ("json", "jsonl", "journal", "sqlite")
+
+
+def create_storage(storage_mode: str, data_file: str, table: str, columns: Dict[str, str],
+                   key_field: str, journal_threshold: int = 1000,
+                   binary_snapshot: bool = False) -> StorageBackend:
+    """
+    Args:
+        storage_mode: "json" 每次变更重写整个 JSON 文件；
+                      "jsonl" 每次变更重写与 JSON 文件同名的 .jsonl 文件，每行一条记录；
+                      "journal" 变更追加到日志文件，后台定期压缩为 JSON 快照；
+                      "sqlite" 保存到与 JSON 文件同名的 .db 数据库
+        data_file: JSON 数据文件路径
+        table: sqlite 模式下的表名
+        columns: sqlite 模式下需要建索引的列
+        key_field: 记录中作为主键的字段
+        journal_threshold: journal 模式下触发压缩的日志条数
+        binary_snapshot: json 模式下同时维护二进制快照以加快启动
+    """
+    if binary_snapshot and storage_mode != "json":
+        raise ValueError("binary_snapshot 只适用于 json 存储模式")
+    if storage_mode == "json":
+        return JsonFileStorage(data_file, binary_snapshot)
+    if storage_mode == "jsonl":
+        return JsonLinesStorage(os.path.splitext(data_file)[0] + '.jsonl', key_field)
+    if storage_mode == "journal":
+        return JournalStorage(data_file, journal_threshold)
+    if storage_mode == "sqlite":
+        return SQLiteStorage(os.path.splitext(data_file)[0] + '.db', table, columns)
+    raise ValueError(f"未知的存储模式: {storage_mode}")
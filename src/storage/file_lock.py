@@ -0,0 +1,69 @@
+"""
+进程间文件锁
+基于 fcntl.flock 的建议锁，同一数据目录下的多个进程在读写数据文件前获取。
+Windows 下没有 fcntl，锁退化为空操作
+"""
+
+import os
+
+from src.utils.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = get_logger(__name__)
+
+if fcntl is None:
+    logger.debug("当前平台不支持 fcntl，多进程共享数据目录时不加文件锁")
+
+
+class FileLock:
+    """独立锁文件上的建议锁，用法: with FileLock(path): ...
+
+    锁与打开的文件绑定，同一进程中的不同线程分别获取时同样互斥。
+    """
+
+    def __init__(self, lock_file: str, shared: bool = False):
+        """
+        Args:
+            lock_file: 锁文件路径，不存在时自动创建
+            shared: True 为共享锁（读），False 为排他锁（写）
+        """
+        self.lock_file = lock_file
+        self.shared = shared
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return self
+        directory = os.path.dirname(self.lock_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.lock_file, 'a')
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+        except BaseException:
+            self._file.close()
+            self._file = None
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._file.close()
+                self._file = None
+        return False
+
+
+def file_signature(path: str):
+    """文件的 (inode, 修改时间, 大小)，用于判断是否被其他进程改写，文件不存在时返回 None"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,91 @@
+"""
+持久化的自增ID分配器
+序列文件中保存已经分配出去的最大ID。每次从文件中预留一段连续的ID，
+段内分配只在内存中计数；多个进程或多个管理器实例共用同一个序列文件时，
+各自预留的段互不重叠，不会分配出重复的ID
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，只保证进程内不重复
+    fcntl = None
+
+
+class IdAllocator:
+    """按段预留的单调递增ID分配器
+
+    预留后未用完的ID在进程退出后作废，ID 可能不连续，但不会重复。
+    """
+
+    def __init__(self, seq_file: str, block_size: int = 100, floor: int = 0):
+        """
+        Args:
+            seq_file: 序列文件路径
+            block_size: 每次预留的ID数量
+            floor: 已存在的最大ID，分配结果总是大于该值，用于接管没有序列文件的旧数据
+        """
+        self.seq_file = seq_file
+        self.block_size = block_size
+        self.floor = floor
+        self._next = 1
+        self._limit = 0
+        self._lock = threading.Lock()
+
+    def next_id(self) -> str:
+        """分配一个新ID"""
+        with self._lock:
+            if self._next > self._limit:
+                start, self._limit = self._reserve(self.block_size)
+                self._next = max(start, self.floor + 1)
+            value = self._next
+            self._next += 1
+            return str(value)
+
+    def observe(self, value: str):
+        """登记外部写入的ID，之后分配的ID都大于它"""
+        if value.isascii() and value.isdigit():
+            with self._lock:
+                self.floor = max(self.floor, int(value))
+                if self._next <= self.floor:
+                    self._next = self.floor + 1
+
+    def _reserve(self, count: int):
+        """在文件锁保护下预留 count 个ID，返回 (起始ID, 结束ID)"""
+        directory = os.path.dirname(self.seq_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.seq_file, 'a+', encoding='utf-8') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                current = self._parse(f.read())
+                start = max(current, self.floor) + 1
+                end = start + count - 1
+                f.seek(0)
+                f.truncate()
+                f.write(str(end))
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return start, end
+
+    @staticmethod
+    def _parse(text: str) -> int:
+        text = text.strip()
+        return int(text) if text.isdigit() else 0
+
+
+def max_numeric_id(keys) -> int:
+    """已有记录中最大的数字ID，没有时返回 0"""
+    return max((int(key) for key in keys if key.isascii() and key.isdigit()), default=0)
+
+
+def default_seq_file(data_file: str) -> str:
+    """与数据文件同名的 .seq 序列文件"""
+    return os.path.splitext(data_file)[0] + '.seq'
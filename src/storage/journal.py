@@ -0,0 +1,144 @@
+"""
+追加写日志（write-ahead journal）存储模块
+每次变更只向日志文件追加一条记录，加载时先读快照再重放日志，
+日志累积到一定条数后在后台线程中压缩为新的快照
+"""
+
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from src.storage.atomic import atomic_write, backup_corrupt_file
+from src.storage.base import StorageBackend
+from src.storage.file_lock import file_signature
+from src.storage.json_stream import iter_json_object
+
+
+class JournalStorage(StorageBackend):
+    """快照 + 追加日志的记录存储
+
+    文件布局（以 products.json 为例）:
+        products.json              快照，格式与普通 JSON 存储完全相同
+        products.json.journal      当前日志，每行一条 JSON 记录
+        products.json.journal.old  正在压缩的旧日志（压缩完成后删除）
+    """
+
+    def __init__(self, snapshot_file: str, compact_threshold: int = 1000):
+        self.snapshot_file = snapshot_file
+        self.journal_file = snapshot_file + '.journal'
+        self.compacting_file = self.journal_file + '.old'
+        self.compact_threshold = compact_threshold
+        self.lock_file = snapshot_file + '.lock'
+        self.entry_count = 0
+        self._lock = threading.Lock()
+        self._compact_thread = None
+
+    def load(self) -> Dict[str, Dict]:
+        """读取快照并按顺序重放日志"""
+        records = {}
+        try:
+            records.update(iter_json_object(self.snapshot_file))
+        except FileNotFoundError:
+            pass
+
+        # 上次压缩未完成时旧日志仍在，需要先于当前日志重放
+        for key, record in self._replay(self.compacting_file):
+            records[key] = record
+        self.entry_count = 0
+        for key, record in self._replay(self.journal_file):
+            records[key] = record
+            self.entry_count += 1
+        return records
+
+    def data_signature(self):
+        # 后台压缩完成时快照也会变化，此时重新读取得到的数据与内存一致，只是多读一次
+        return file_signature(self.snapshot_file), file_signature(self.journal_file)
+
+    def _replay(self, path: str) -> Iterator[Tuple[str, Dict]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 崩溃时最后一行可能只写了一半，直接跳过
+                        continue
+                    if entry.get('op') == 'put':
+                        yield entry['key'], entry['data']
+        except FileNotFoundError:
+            return
+
+    def save(self, changes: Dict[str, Dict], snapshot: Callable[[], Dict[str, Dict]]):
+        for key, record in changes.items():
+            self.append(key, record)
+        if self.needs_compaction():
+            self.compact(snapshot)
+
+    def append(self, key: str, record: Dict):
+        """追加一条变更记录"""
+        line = json.dumps({'op': 'put', 'key': key, 'data': record}, ensure_ascii=False)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.journal_file), exist_ok=True)
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+            self.entry_count += 1
+
+    def needs_compaction(self) -> bool:
+        """日志条数是否已超过压缩阈值"""
+        return self.entry_count >= self.compact_threshold
+
+    def compact(self, snapshot_source: Callable[[], Dict[str, Dict]]):
+        """把当前日志轮转出去，并在后台线程中写入新快照
+
+        调用方需持有排他文件锁（save 在 locked() 内调用）；后台线程写快照和删除旧日志时
+        会再次获取文件锁，因此持有锁时不能等待压缩完成。
+        snapshot_source 在后台线程中调用，返回全部记录。轮转之后的新变更
+        会写入新日志，即使快照里已经包含了它们，重放时也只是重复覆盖同一条记录。
+        """
+        with self._lock:
+            if self._compact_thread is not None and self._compact_thread.is_alive():
+                return
+            if not os.path.exists(self.journal_file):
+                return
+            if os.path.exists(self.compacting_file):
+                # 上一次压缩中断或其他进程的压缩尚未完成，遗留的旧日志先并入当前日志再轮转
+                with open(self.compacting_file, 'r', encoding='utf-8') as old, \
+                        open(self.journal_file, 'r', encoding='utf-8') as cur:
+                    merged = old.read() + cur.read()
+                with open(self.compacting_file, 'w', encoding='utf-8') as f:
+                    f.write(merged)
+                os.remove(self.journal_file)
+            else:
+                os.replace(self.journal_file, self.compacting_file)
+            self.entry_count = 0
+            # 记下本次轮转出的旧日志，之后只删除它
+            rotated = file_signature(self.compacting_file)
+            self._compact_thread = threading.Thread(
+                target=self._write_snapshot, args=(snapshot_source, rotated), daemon=True
+            )
+            self._compact_thread.start()
+
+    def _write_snapshot(self, snapshot_source: Callable[[], Dict[str, Dict]], rotated):
+        records = snapshot_source()
+        # 检查、写快照和删除旧日志都在文件锁内进行，不会与其他进程的轮转或压缩交错
+        with self.locked():
+            if file_signature(self.compacting_file) != rotated:
+                # 其他进程已把它的日志并入本次轮转出的旧日志，由那次压缩写入更新的快照
+                # 并删除旧日志；这里的快照可能更旧，不能覆盖
+                return
+            with atomic_write(self.snapshot_file) as f:
+                json.dump(records, f, indent=2, ensure_ascii=False)
+            os.remove(self.compacting_file)
+
+    def backup_corrupt(self) -> Optional[str]:
+        return backup_corrupt_file(self.snapshot_file)
+
+    def close(self):
+        self.wait()
+
+    def wait(self):
+        """等待正在进行的后台压缩完成"""
+        thread = self._compact_thread
+        if thread is not None:
+            thread.join()
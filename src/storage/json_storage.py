@@ -0,0 +1,82 @@
+"""
+JSON 文件存储后端
+每次保存都把全部记录重写为一个文件，读取时逐条流式解析
+"""
+
+import json
+import os
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from src.storage.atomic import atomic_write, backup_corrupt_file
+from src.storage.base import StorageBackend
+from src.storage.file_lock import file_signature
+from src.storage.json_stream import ProgressCallback, iter_json_lines, iter_json_object
+from src.storage.snapshot import iter_snapshot, write_snapshot
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class JsonFileStorage(StorageBackend):
+    """格式化的 JSON 对象文件，{key: record, ...}
+
+    开启 binary_snapshot 时每次保存同时写一份二进制快照（data_file + '.snap'），
+    加载时快照不比 JSON 旧就优先读取快照。
+    """
+
+    def __init__(self, data_file: str, binary_snapshot: bool = False):
+        self.data_file = data_file
+        self.binary_snapshot = binary_snapshot
+        self.snapshot_file = data_file + '.snap'
+        self.lock_file = data_file + '.lock'
+
+    def _snapshot_is_fresh(self) -> bool:
+        try:
+            return os.stat(self.snapshot_file).st_mtime_ns >= os.stat(self.data_file).st_mtime_ns
+        except FileNotFoundError:
+            return os.path.exists(self.snapshot_file)
+
+    def iter_records(self, progress: ProgressCallback = None) -> Iterator[Tuple[str, Dict]]:
+        if self.binary_snapshot and self._snapshot_is_fresh():
+            try:
+                return iter_snapshot(self.snapshot_file)
+            except ValueError as e:
+                logger.warning("读取二进制快照失败，改为读取 JSON: %s", e)
+        return iter_json_object(self.data_file, progress=progress)
+
+    def data_signature(self):
+        return file_signature(self.data_file)
+
+    def save(self, changes: Dict[str, Dict], snapshot: Callable[[], Dict[str, Dict]]):
+        records = snapshot()
+        with atomic_write(self.data_file) as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+        # 快照在 JSON 之后写入，修改时间不早于 JSON
+        if self.binary_snapshot:
+            write_snapshot(self.snapshot_file, records)
+
+    def backup_corrupt(self) -> Optional[str]:
+        return backup_corrupt_file(self.data_file)
+
+
+class JsonLinesStorage(StorageBackend):
+    """JSON Lines 文件，每行一条记录，键取自记录中的 key_field 字段"""
+
+    def __init__(self, data_file: str, key_field: str):
+        self.data_file = data_file
+        self.key_field = key_field
+        self.lock_file = data_file + '.lock'
+
+    def iter_records(self, progress: ProgressCallback = None) -> Iterator[Tuple[str, Dict]]:
+        return iter_json_lines(self.data_file, self.key_field, progress=progress)
+
+    def data_signature(self):
+        return file_signature(self.data_file)
+
+    def save(self, changes: Dict[str, Dict], snapshot: Callable[[], Dict[str, Dict]]):
+        with atomic_write(self.data_file) as f:
+            for record in snapshot().values():
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def backup_corrupt(self) -> Optional[str]:
+        return backup_corrupt_file(self.data_file)
@@ -0,0 +1,134 @@
+"""
+流式 JSON 读取
+逐条解析顶层为对象的 JSON 文件或 JSON Lines 文件，读取过程中内存只保留
+当前缓冲区和正在解析的一条记录
+"""
+
+import codecs
+import json
+import os
+import re
+from typing import Callable, Dict, Iterator, Tuple
+
+# 进度回调：(已读取字节数, 文件总字节数)
+ProgressCallback = Callable[[int, int], None]
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _StreamReader:
+    """按块读取 UTF-8 文件并维护未消费的文本缓冲区"""
+
+    def __init__(self, f, chunk_size: int, progress: ProgressCallback = None):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.total = os.fstat(f.fileno()).st_size
+        self.bytes_read = 0
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        chunk = self.f.read(self.chunk_size)
+        self.eof = not chunk
+        self.bytes_read += len(chunk)
+        self.buf = self.buf[self.pos:] + self.decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+        if self.progress is not None:
+            self.progress(self.bytes_read, self.total)
+
+    def skip_whitespace(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return
+            self.fill()
+
+    def peek(self) -> str:
+        self.skip_whitespace()
+        return self.buf[self.pos] if self.pos < len(self.buf) else ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def read_value(self, decoder: json.JSONDecoder):
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # 值还没有完整读入缓冲区，继续读下一块
+                if self.eof:
+                    raise
+                self.fill()
+                continue
+            if end == len(self.buf) and not self.eof:
+                # 数字等值可能恰好在块边界被截断，读入更多后重新解析
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_object(path: str, chunk_size: int = 1 << 16,
+                     progress: ProgressCallback = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    逐条读取顶层为对象的 JSON 文件
+
+    Args:
+        path: 文件路径
+        chunk_size: 每次读取的字节数
+        progress: 进度回调，每读取一块调用一次
+
+    Yields:
+        (键, 值)
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'rb') as f:
+        reader = _StreamReader(f, chunk_size, progress)
+        reader.fill()
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.read_value(decoder)
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name", reader.buf, reader.pos)
+            reader.expect(':')
+            yield key, reader.read_value(decoder)
+            if reader.peek() == ',':
+                reader.pos += 1
+                continue
+            reader.expect('}')
+            return
+
+
+def iter_json_lines(path: str, key_field: str,
+                    progress: ProgressCallback = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    逐行读取 JSON Lines 文件，每行一条记录
+
+    Args:
+        path: 文件路径
+        key_field: 作为键的字段名
+        progress: 进度回调，每 1000 行调用一次
+
+    Yields:
+        (键, 记录)
+    """
+    with open(path, 'rb') as f:
+        total = os.fstat(f.fileno()).st_size
+        bytes_read = 0
+        for line_no, line in enumerate(f, 1):
+            bytes_read += len(line)
+            if line.strip():
+                record = json.loads(line)
+                yield record[key_field], record
+            if progress is not None and line_no % 1000 == 0:
+                progress(bytes_read, total)
+        if progress is not None:
+            progress(bytes_read, total)
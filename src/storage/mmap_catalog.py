@@ -0,0 +1,296 @@
+"""
+内存映射的只读商品目录
+写入方把全部记录发布为固定布局的文件，多个只读进程用 mmap 映射同一个文件，
+共享操作系统的页缓存，不必各自在内存中构造全部记录
+
+文件结构:
+    头部: MAGIC (8 字节) + 记录数 (uint32) + 单条记录字节数 (uint32) + 排序表数 (uint32)
+    记录表: 按主键排序的定长记录，字符串字段保存为 (偏移, 长度)，数值字段直接保存
+    排序表: 每个排序一张，按排序键升序排列的记录位置 (uint32)，查询按顺序读取即可提前停止
+    字符串区: UTF-8 文本，相同的字符串只保存一份，偏移相对于字符串区起点
+
+发布时先写临时文件再替换，已经映射旧文件的进程不受影响，检测到文件被替换后
+重新映射即可。Windows 下被映射的文件不能被替换，只读进程需要先关闭旧映射。
+"""
+
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+
+from src.storage.atomic import atomic_write
+
+MAGIC = b'CMCAT002'
+
+_HEADER = struct.Struct('<8sIII')
+_POSITION = struct.Struct('<I')
+# 字符串长度为该值表示 None
+_NONE_LENGTH = 0xFFFFFFFF
+_KIND_FORMATS = {'str': 'II', 'json': 'II', 'float': 'd', 'int': 'q'}
+
+# 商品目录的字段及类型，第一个字段为主键
+PRODUCT_CATALOG_FIELDS = (
+    ('product_id', 'str'),
+    ('title', 'str'),
+    ('description', 'str'),
+    ('price', 'float'),
+    ('original_price', 'float'),
+    ('category', 'str'),
+    ('seller_id', 'str'),
+    ('campus', 'str'),
+    ('condition', 'str'),
+    ('status', 'str'),
+    ('create_time', 'str'),
+    ('images', 'json'),
+    ('view_count', 'int'),
+    ('like_count', 'int'),
+)
+
+# 商品目录的排序表：名称 -> 排序字段，与 TimeIndex.key、PriceIndex.key 的顺序一致
+PRODUCT_CATALOG_ORDERS = {
+    'time': ('create_time', 'product_id'),
+    'price': ('price', 'product_id'),
+}
+
+
+def _record_struct(fields: Sequence[Tuple[str, str]]) -> struct.Struct:
+    return struct.Struct('<' + ''.join(_KIND_FORMATS[kind] for _, kind in fields))
+
+
+def _order_value(value, kind: str):
+    # 与读取时一致：字符串的 None 按空字符串排序，数值的 None 保存为 0
+    if kind == 'str':
+        return value or ""
+    return value or 0
+
+
+def publish_catalog(path: str, records: Dict[str, Dict],
+                    fields: Sequence[Tuple[str, str]] = PRODUCT_CATALOG_FIELDS,
+                    orders: Mapping[str, Sequence[str]] = PRODUCT_CATALOG_ORDERS):
+    """
+    把全部记录写为目录文件，先写临时文件再替换
+
+    Args:
+        path: 目录文件路径
+        records: {key: record}
+        fields: 字段及类型，取值为 'str'、'json'、'float'、'int'
+        orders: 排序表名称 -> 排序字段，字段须为 'str'、'float' 或 'int' 类型
+    """
+    record_struct = _record_struct(fields)
+    heap = bytearray()
+    heap_offsets: Dict[str, Tuple[int, int]] = {}
+
+    def encode(text: Optional[str]) -> Tuple[int, int]:
+        if text is None:
+            return 0, _NONE_LENGTH
+        location = heap_offsets.get(text)
+        if location is None:
+            data = text.encode('utf-8')
+            location = heap_offsets[text] = (len(heap), len(data))
+            heap.extend(data)
+        return location
+
+    keys = sorted(records)
+    kinds = dict(fields)
+    order_tables = bytearray()
+    for names in orders.values():
+        def order_key(position, names=names):
+            record = records[keys[position]]
+            return tuple(_order_value(record.get(name), kinds[name]) for name in names)
+        positions = sorted(range(len(keys)), key=order_key)
+        order_tables.extend(struct.pack(f'<{len(positions)}I', *positions))
+
+    table = bytearray()
+    for key in keys:
+        record = records[key]
+        values = []
+        for name, kind in fields:
+            value = record.get(name)
+            if kind == 'str':
+                values.extend(encode(value))
+            elif kind == 'json':
+                values.extend(encode(None if value is None else json.dumps(value, ensure_ascii=False)))
+            else:
+                values.append(value or 0)
+        table.extend(record_struct.pack(*values))
+
+    with atomic_write(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(records), record_struct.size, len(orders)))
+        f.write(table)
+        f.write(order_tables)
+        f.write(heap)
+
+
+class MmapCatalog:
+    """只读映射目录文件，按需解码单条记录或单个字段
+
+    文件不存在时视为空目录，之后可通过 reload_if_changed 加载。
+    """
+
+    def __init__(self, path: str, fields: Sequence[Tuple[str, str]] = PRODUCT_CATALOG_FIELDS,
+                 orders: Mapping[str, Sequence[str]] = PRODUCT_CATALOG_ORDERS):
+        self.path = path
+        self.fields = tuple(fields)
+        self.orders = {name: tuple(names) for name, names in orders.items()}
+        self._record = _record_struct(self.fields)
+        # 字段名 -> (在解包结果中的位置, 类型)
+        self._slots = {}
+        position = 0
+        for name, kind in self.fields:
+            self._slots[name] = (position, kind)
+            position += len(_KIND_FORMATS[kind])
+        self._mm = None
+        self._count = 0
+        # 排序表名称 -> 排序表起点
+        self._order_starts: Dict[str, int] = {}
+        self._heap_start = 0
+        self._signature = None
+        # 每次重新映射时递增
+        self.version = 0
+        self.reload_if_changed()
+
+    @staticmethod
+    def _signature_of(stat: os.stat_result) -> tuple:
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def reload_if_changed(self) -> bool:
+        """
+        文件被重新发布时重新映射
+
+        Raises:
+            ValueError: 文件不是有效的目录文件
+
+        Returns:
+            是否重新映射
+        """
+        try:
+            if self._signature_of(os.stat(self.path)) == self._signature:
+                return False
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+        with f:
+            # 以实际打开的文件为准，避免 stat 之后文件又被替换
+            signature = self._signature_of(os.fstat(f.fileno()))
+            if signature[2] < _HEADER.size:
+                raise ValueError(f"不是有效的目录文件: {self.path}")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, record_size, order_count = _HEADER.unpack_from(mm, 0)
+        orders_start = _HEADER.size + count * record_size
+        heap_start = orders_start + order_count * count * _POSITION.size
+        if (magic != MAGIC or record_size != self._record.size or order_count != len(self.orders)
+                or heap_start > len(mm)):
+            mm.close()
+            raise ValueError(f"不是有效的目录文件: {self.path}")
+        old_mm = self._mm
+        self._mm, self._count, self._heap_start = mm, count, heap_start
+        self._order_starts = {name: orders_start + number * count * _POSITION.size
+                              for number, name in enumerate(self.orders)}
+        self._signature = signature
+        self.version += 1
+        if old_mm is not None:
+            old_mm.close()
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+            self._count = 0
+            self._signature = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _raw(self, index: int) -> tuple:
+        return self._record.unpack_from(self._mm, _HEADER.size + index * self._record.size)
+
+    def _decode(self, raw: tuple, name: str):
+        position, kind = self._slots[name]
+        if kind in ('str', 'json'):
+            offset, length = raw[position], raw[position + 1]
+            if length == _NONE_LENGTH:
+                return None
+            start = self._heap_start + offset
+            text = str(self._mm[start:start + length], 'utf-8')
+            return json.loads(text) if kind == 'json' else text
+        return raw[position]
+
+    def key(self, index: int) -> str:
+        return self._decode(self._raw(index), self.fields[0][0])
+
+    def record(self, index: int, names: Iterable[str] = None) -> Dict:
+        """解码第 index 条记录，names 为空时解码全部字段"""
+        raw = self._raw(index)
+        if names is None:
+            names = self._slots
+        return {name: self._decode(raw, name) for name in names}
+
+    def find(self, key: str) -> int:
+        """二分查找主键，不存在时返回 -1"""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self._count and self.key(lo) == key else -1
+
+    def get(self, key: str) -> Optional[Dict]:
+        index = self.find(key)
+        return self.record(index) if index >= 0 else None
+
+    def keys(self) -> Iterator[str]:
+        for index in range(self._count):
+            yield self.key(index)
+
+    def scan(self, names: Iterable[str]) -> Iterator[Tuple[int, Dict]]:
+        """逐条解码指定字段，返回 (记录位置, 字段字典)"""
+        names = tuple(names)
+        for index in range(self._count):
+            yield index, self.record(index, names)
+
+    def _at(self, order: str, position: int) -> int:
+        return _POSITION.unpack_from(self._mm, self._order_starts[order] + position * _POSITION.size)[0]
+
+    def order_key(self, order: str, index: int) -> tuple:
+        """第 index 条记录在排序表 order 中的排序键"""
+        raw = self._raw(index)
+        return tuple(_order_value(self._decode(raw, name), self._slots[name][1])
+                     for name in self.orders[order])
+
+    def bisect(self, order: str, key: tuple, right: bool = False) -> int:
+        """排序键 key 在排序表 order 中的插入位置，right 为 True 时排在相等的键之后"""
+        keys = _OrderKeys(self, order)
+        return bisect_right(keys, key) if right else bisect_left(keys, key)
+
+    def ordered(self, order: str, lo: int = 0, hi: int = None, reverse: bool = False) -> Iterator[int]:
+        """按排序表 order 依次返回位置 [lo, hi) 上的记录位置，reverse 为 True 时从后往前"""
+        if hi is None:
+            hi = self._count
+        positions = range(hi - 1, lo - 1, -1) if reverse else range(lo, hi)
+        for position in positions:
+            yield self._at(order, position)
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict]]:
+        key_field = self.fields[0][0]
+        for index in range(self._count):
+            record = self.record(index)
+            yield record[key_field], record
+
+
+class _OrderKeys(Sequence):
+    """把排序表当作排序键的序列，供 bisect 二分查找，只解码被比较的记录"""
+
+    def __init__(self, catalog: MmapCatalog, order: str):
+        self._catalog = catalog
+        self._order = order
+
+    def __len__(self) -> int:
+        return len(self._catalog)
+
+    def __getitem__(self, position: int) -> tuple:
+        return self._catalog.order_key(self._order, self._catalog._at(self._order, position))
@@ -0,0 +1,77 @@
+"""
+二进制快照格式
+用于加快冷启动：记录按字段顺序存为元组，整体用 marshal 序列化。写入前把相同的
+字符串合并为同一个对象，marshal 对重复对象只写一次引用，重复的取值（校区、
+分类、状态等）在文件中只保存一份，读取时也直接共享同一个字符串对象
+
+文件结构:
+    MAGIC (8 字节) + marshal((fields, rows))
+    rows 中每一项为 (key, values)，字段不完整的记录 values 直接保存为字典
+"""
+
+import marshal
+from typing import Dict, Iterator, List, Tuple
+
+from src.storage.atomic import atomic_write
+
+MAGIC = b'CMSNAP01'
+MARSHAL_VERSION = 4
+
+
+def write_snapshot(path: str, records: Dict[str, Dict]):
+    """
+    写入二进制快照，先写临时文件再替换，读取方不会看到写了一半的文件
+
+    Args:
+        path: 快照文件路径
+        records: {key: record}
+    """
+    fields: List[str] = []
+    for record in records.values():
+        fields = list(record)
+        break
+    field_set = set(fields)
+    shared: Dict[str, str] = {}
+
+    rows = []
+    for key, record in records.items():
+        if record.keys() != field_set:
+            rows.append((key, record))
+            continue
+        values = tuple(shared.setdefault(value, value) if isinstance(value, str) else value
+                       for value in map(record.__getitem__, fields))
+        rows.append((key, values))
+
+    with atomic_write(path, 'wb') as f:
+        f.write(MAGIC)
+        marshal.dump((fields, rows), f, MARSHAL_VERSION)
+
+
+def iter_snapshot(path: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    读取二进制快照，文件在调用时立即读入并校验，记录在迭代时逐条还原
+
+    Raises:
+        ValueError: 文件不是有效的快照
+
+    Returns:
+        逐条返回 (键, 记录) 的迭代器
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是有效的快照文件: {path}")
+        # 整块读入后再反序列化，marshal.load 直接读文件对象会频繁发起小块读取
+        data = f.read()
+    try:
+        fields, rows = marshal.loads(data)
+    except (EOFError, TypeError, ValueError) as e:
+        raise ValueError(f"快照文件已损坏: {path}") from e
+    return _decode_rows(fields, rows)
+
+
+def _decode_rows(fields, rows) -> Iterator[Tuple[str, Dict]]:
+    for key, values in rows:
+        if isinstance(values, dict):
+            yield key, values
+        else:
+            yield key, dict(zip(fields, values))
@@ -0,0 +1,209 @@
+"""
+SQLite 存储后端
+完整记录以 JSON 文本保存在 data 列，常用查询字段单独建列并建立索引，
+select 在数据库中筛选、排序和分页，只反序列化命中的行；增量写入只涉及变更的行
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.storage.base import StorageBackend
+
+# 商品表的索引列（列名与记录字段同名）
+PRODUCT_COLUMNS = {
+    'status': 'TEXT',
+    'category': 'TEXT',
+    'campus': 'TEXT',
+    'seller_id': 'TEXT',
+    'price': 'REAL',
+    'create_time': 'TEXT',
+}
+
+# 用户表的索引列
+USER_COLUMNS = {
+    'username': 'TEXT',
+    'email': 'TEXT',
+}
+
+
+def _contains_ci(text: Optional[str], needle: str) -> bool:
+    # 用 Python 的 lower() 而不是 SQLite 的 lower()，后者只转换 ASCII 字母
+    return text is not None and needle in text.lower()
+
+
+class SQLiteStorage(StorageBackend):
+    supports_random_access = True
+    supports_queries = True
+
+    def __init__(self, db_file: str, table: str, columns: Dict[str, str]):
+        self.db_file = db_file
+        self.table = table
+        self.columns = list(columns)
+        self.column_types = dict(columns)
+        # 可重入：locked() 的事务期间同一线程还要执行其他语句
+        self._lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(db_file) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.create_function('contains_ci', 2, _contains_ci, deterministic=True)
+        column_defs = ''.join(f', {name} {sql_type}' for name, sql_type in columns.items())
+        with self.conn:
+            self.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, data TEXT NOT NULL{column_defs})'
+            )
+            for name in self.columns:
+                self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{name} ON {table} ({name})')
+
+    def iter_records(self, progress: Callable[[int, int], None] = None) -> Iterator[Tuple[str, Dict]]:
+        """分批读取记录，进度单位为行数"""
+        return self._iter_rows('data', (), progress)
+
+    def iter_summaries(self, omit: Sequence[str],
+                       progress: Callable[[int, int], None] = None) -> Iterator[Tuple[str, Dict]]:
+        if not omit:
+            return self.iter_records(progress)
+        # json_remove 在数据库中删掉大字段，Python 端只解析剩下的部分
+        paths = ', '.join('?' * len(omit))
+        return self._iter_rows(f'json_remove(data, {paths})', [f'$.{name}' for name in omit], progress)
+
+    def _iter_rows(self, expression: str, params: Sequence,
+                   progress: Callable[[int, int], None]) -> Iterator[Tuple[str, Dict]]:
+        with self._lock:
+            total = self.conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+            cursor = self.conn.execute(f'SELECT id, {expression} FROM {self.table}', params)
+        done = 0
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for key, data in rows:
+                yield key, json.loads(data)
+            done += len(rows)
+            if progress is not None:
+                progress(done, total)
+
+    def locked(self, shared: bool = False) -> ContextManager:
+        """排他时在 BEGIN IMMEDIATE 事务中执行，其他进程的写入要等事务结束，
+        锁内先检查再写入（如注册时查重）是原子的；WAL 下读取总能看到一致的数据，共享时不加锁"""
+        if shared:
+            return nullcontext()
+        return self._immediate_transaction()
+
+    @contextmanager
+    def _immediate_transaction(self):
+        # 事务期间持有线程锁，其他线程的语句不会混入本事务
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                raise
+            # save() 提交后事务已经结束
+            if self.conn.in_transaction:
+                self.conn.commit()
+
+    def data_signature(self):
+        # data_version 只在其他连接提交后变化，本连接的写入不影响
+        with self._lock:
+            return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def save(self, changes: Dict[str, Dict], snapshot: Callable[[], Dict[str, Dict]]):
+        if not changes:
+            return
+        placeholders = ', '.join('?' * (len(self.columns) + 2))
+        sql = f'INSERT OR REPLACE INTO {self.table} (id, data, {", ".join(self.columns)}) VALUES ({placeholders})'
+        rows = [
+            (key, json.dumps(record, ensure_ascii=False), *(record.get(name) for name in self.columns))
+            for key, record in changes.items()
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(sql, rows)
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute(f'SELECT data FROM {self.table} WHERE id = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def select(self, where: Dict[str, object] = None, ranges: Dict[str, Tuple] = None,
+               contains: Tuple[str, Sequence[str]] = None, order_by: Sequence[str] = (),
+               descending: bool = False, after: Sequence = None, limit: int = None,
+               offset: int = 0) -> List[Dict]:
+        """按索引列查询记录
+
+        Args:
+            where: 等值条件，如 {'status': '在售', 'campus': '主校区'}
+            ranges: 闭区间条件，如 {'price': (10, 100)}，边界为 None 表示不限
+            contains: (关键词, 字段名)，任一字段包含关键词即命中，不区分大小写；
+                      字段从 data 中取出，不必是索引列
+            order_by: 排序列，可以包含主键 'id'，为空时按最后写入的顺序；
+                      文本列的 NULL 按空字符串排序
+            descending: 全部排序列是否倒序
+            after: 与 order_by 一一对应的值，只返回排在它之后的记录，用于键集分页
+            limit: 最多返回条数
+            offset: 跳过的条数
+        """
+        clauses, params = [], []
+        for name, value in (where or {}).items():
+            self._check_column(name)
+            clauses.append(f'{name} = ?')
+            params.append(value)
+        for name, (low, high) in (ranges or {}).items():
+            self._check_column(name)
+            if low is not None:
+                clauses.append(f'{name} >= ?')
+                params.append(low)
+            if high is not None:
+                clauses.append(f'{name} <= ?')
+                params.append(high)
+        if contains is not None:
+            keyword, fields = contains
+            matches = []
+            for field in fields:
+                matches.append('contains_ci(json_extract(data, ?), ?)')
+                params.extend((f'$.{field}', keyword.lower()))
+            clauses.append('(' + ' OR '.join(matches) + ')')
+
+        order = [self._sort_expression(name) for name in order_by]
+        if after is not None:
+            if len(after) != len(order):
+                raise ValueError("after 必须与 order_by 一一对应")
+            placeholders = ', '.join('?' * len(order))
+            clauses.append(f'({", ".join(order)}) {"<" if descending else ">"} ({placeholders})')
+            params.extend(after)
+
+        sql = f'SELECT data FROM {self.table}'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        direction = ' DESC' if descending else ''
+        sql += ' ORDER BY ' + (', '.join(expr + direction for expr in order) if order else 'rowid')
+        if limit is not None or offset:
+            sql += ' LIMIT ? OFFSET ?'
+            params.extend((-1 if limit is None else limit, offset))
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def _sort_expression(self, name: str) -> str:
+        if name == 'id':
+            return name
+        self._check_column(name)
+        return f"COALESCE({name}, '')" if self.column_types[name] == 'TEXT' else name
+
+    def _check_column(self, name: str):
+        # 列名直接拼进 SQL，只允许建过索引的列
+        if name not in self.columns:
+            raise ValueError(f"{self.table} 表没有索引列: {name}")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -8,11 +8,22 @@ class AdminFrame(ttk.Frame):
         self.auth_service = auth_service
         self.product_service = product_service
         self.switch_to_main = switch_to_main
+        # 商品ID -> 勾选状态，用于批量审核
+        self.selected_vars = {}
+        # 商品ID -> 卡片
+        self.cards = {}
+        self.empty_label = None
         
         # 创建自定义样式
         self.create_styles()
         self.create_widgets()
         self.load_pending_products()
+        # 有商品新提交或被审核时只增删对应的卡片
+        self.product_service.subscribe_changes(self.on_products_changed)
+    
+    def destroy(self):
+        self.product_service.unsubscribe_changes(self.on_products_changed)
+        super().destroy()
     
     def create_styles(self):
         """创建自定义按钮样式"""
@@ -73,11 +84,36 @@ class AdminFrame(ttk.Frame):
         self.create_stats_cards()
         
         # 待审核商品区域
+        header_frame = ttk.Frame(self)
+        header_frame.pack(fill="x", padx=20, pady=(20, 10))
         ttk.Label(
-            self, 
+            header_frame, 
             text="待审核商品", 
             font=("Arial", 14, "bold")
-        ).pack(anchor="w", padx=20, pady=(20, 10))
+        ).pack(side="left")
+        
+        # 批量操作：勾选多个商品后一次审核通过
+        bulk_approve_btn = tk.Button(
+            header_frame,
+            text="批量通过",
+            bg="#3498db",
+            fg="white",
+            font=("Arial", 10, "bold"),
+            padx=15,
+            pady=5,
+            relief="flat",
+            command=self.approve_selected_products
+        )
+        bulk_approve_btn.pack(side="right")
+        self.bind_button_hover(bulk_approve_btn, "#3498db", "#2980b9")
+        
+        self.select_all_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            header_frame,
+            text="全选",
+            variable=self.select_all_var,
+            command=self.toggle_select_all
+        ).pack(side="right", padx=(0, 10))
         
         # 创建滚动框架
         list_frame = ttk.Frame(self)
@@ -140,24 +176,49 @@ class AdminFrame(ttk.Frame):
         # 清空现有内容
         for widget in self.scrollable_frame.winfo_children():
             widget.destroy()
+        self.selected_vars = {}
+        self.cards = {}
+        self.empty_label = None
+        self.select_all_var.set(False)
         
         # 获取待审核商品
         pending_products = self.product_service.get_pending_products()
         
         if not pending_products:
-            empty_label = ttk.Label(
-                self.scrollable_frame, 
-                text="暂无待审核商品", 
-                font=("Arial", 12),
-                foreground="gray"
-            )
-            empty_label.pack(pady=50)
+            self.show_empty_label()
             return
         
         # 显示待审核商品
         for product in pending_products:
             self.create_product_card(product)
     
+    def show_empty_label(self):
+        self.empty_label = ttk.Label(
+            self.scrollable_frame, 
+            text="暂无待审核商品", 
+            font=("Arial", 12),
+            foreground="gray"
+        )
+        self.empty_label.pack(pady=50)
+    
+    def on_products_changed(self, events):
+        """根据商品变更事件增删待审核卡片"""
+        for event in events:
+            pid = event.product_id
+            if event.status == ProductStatus.PENDING:
+                if pid not in self.cards:
+                    product = self.product_service.get_product(pid)
+                    if product is not None:
+                        if self.empty_label is not None:
+                            self.empty_label.destroy()
+                            self.empty_label = None
+                        self.create_product_card(product)
+            elif pid in self.cards:
+                self.cards.pop(pid).destroy()
+                self.selected_vars.pop(pid, None)
+                if not self.cards:
+                    self.show_empty_label()
+    
     def create_product_card(self, product):
         """创建商品卡片"""
         card_frame = ttk.Frame(
@@ -167,6 +228,7 @@ class AdminFrame(ttk.Frame):
             padding=10
         )
         card_frame.pack(fill="x", padx=5, pady=8)
+        self.cards[product['product_id']] = card_frame
         
         # 商品标题和价格
         title_frame = ttk.Frame(card_frame)
@@ -239,6 +301,11 @@ class AdminFrame(ttk.Frame):
         btn_frame = ttk.Frame(card_frame)
         btn_frame.pack(fill="x", pady=(5, 0))
         
+        # 勾选框，用于批量审核
+        selected_var = tk.BooleanVar(value=False)
+        self.selected_vars[product['product_id']] = selected_var
+        ttk.Checkbutton(btn_frame, text="选择", variable=selected_var).pack(side="left")
+        
         # 使用 tk.Button 而不是 ttk.Button 以确保样式正确应用
         # 拒绝按钮（红色）
         reject_btn = tk.Button(
@@ -285,12 +352,32 @@ class AdminFrame(ttk.Frame):
     
     def approve_product(self, product_id):
         """审核通过商品"""
+        # 审核通过后由变更事件移除对应卡片，不需要重新加载列表
         if self.product_service.approve_product(product_id):
             messagebox.showinfo("成功", "商品审核通过，已上架展示")
-            self.load_pending_products()  # 刷新列表
         else:
             messagebox.showerror("错误", "审核失败，请重试")
     
+    def toggle_select_all(self):
+        """全选或取消全选待审核商品"""
+        selected = self.select_all_var.get()
+        for var in self.selected_vars.values():
+            var.set(selected)
+    
+    def approve_selected_products(self):
+        """批量审核通过勾选的商品，只保存一次、刷新一次列表"""
+        product_ids = [pid for pid, var in self.selected_vars.items() if var.get()]
+        if not product_ids:
+            messagebox.showinfo("提示", "请先勾选要审核的商品")
+            return
+        
+        approved = self.product_service.approve_products(product_ids)
+        if len(approved) == len(product_ids):
+            messagebox.showinfo("成功", f"已审核通过 {len(approved)} 件商品")
+        else:
+            messagebox.showwarning("部分失败", f"已审核通过 {len(approved)} 件商品，"
+                                            f"{len(product_ids) - len(approved)} 件审核失败")
+    
     def reject_product(self, product_id):
         """拒绝商品"""
         if messagebox.askyesno("确认拒绝", "确定要拒绝这个商品吗？"):
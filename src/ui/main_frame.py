@@ -1,17 +1,83 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from src.models.product import ProductCategory
+from src.models.product import EVENT_UPDATED, ProductCategory
+from src.ui.virtual_list import VirtualList
+
+class ProductCard(ttk.Frame):
+    """商品卡片，控件只创建一次，由 show 切换显示的商品以便虚拟列表复用"""
+    
+    def __init__(self, parent):
+        super().__init__(parent, relief="solid", borderwidth=1)
+        
+        # 商品标题和价格
+        title_frame = ttk.Frame(self)
+        title_frame.pack(fill="x", padx=10, pady=5)
+        
+        self.title_label = ttk.Label(title_frame, font=("Arial", 12, "bold"))
+        self.title_label.pack(side="left")
+        
+        self.price_label = ttk.Label(title_frame, font=("Arial", 12, "bold"), foreground="red")
+        self.price_label.pack(side="right")
+        
+        # 商品描述
+        self.desc_label = ttk.Label(self)
+        self.desc_label.pack(anchor="w", padx=10, pady=2)
+        
+        # 商品信息
+        info_frame = ttk.Frame(self)
+        info_frame.pack(fill="x", padx=10, pady=2)
+        
+        # 显示卖家类型（学生/教师）
+        self.seller_type_label = ttk.Label(info_frame, font=("Arial", 9, "bold"))
+        self.seller_type_label.pack(side="left")
+        
+        self.seller_label = ttk.Label(info_frame)
+        self.seller_label.pack(side="left", padx=(5, 0))
+        self.credit_label = ttk.Label(info_frame)
+        self.credit_label.pack(side="left", padx=(20, 0))
+        self.campus_label = ttk.Label(info_frame)
+        self.campus_label.pack(side="right")
+    
+    def show(self, product):
+        self.title_label.configure(text=product['title'])
+        self.price_label.configure(text=f"¥{product['price']}")
+        self.desc_label.configure(text=product['description'][:50] + "...")
+        seller_type_color = "#3498db" if product['seller_type'] == "学生" else "#e74c3c"
+        self.seller_type_label.configure(text=product['seller_type'], foreground=seller_type_color)
+        self.seller_label.configure(text=f"卖家: {product['seller_name']}")
+        self.credit_label.configure(text=f"信用: {product['seller_credit']}")
+        self.campus_label.configure(text=f"校区: {product['campus']}")
 
 class MainFrame(ttk.Frame):
+    # 排序选项显示文本 -> ProductService 的 sort_by 参数
+    SORT_OPTIONS = {
+        "最新发布": "time",
+        "价格从低到高": "price_asc",
+        "价格从高到低": "price_desc",
+    }
+    # 每次加载的商品数量
+    PAGE_SIZE = 30
+    # 商品卡片占用的高度（像素），虚拟列表按固定行高计算可见范围
+    CARD_HEIGHT = 110
+    
     def __init__(self, parent, auth_service, product_service, switch_to_publish, switch_to_admin):
         super().__init__(parent)
         self.auth_service = auth_service
         self.product_service = product_service
         self.switch_to_publish = switch_to_publish
         self.switch_to_admin = switch_to_admin
+        # 已加载的商品ID，以及按显示顺序排列的 (排序键, 商品ID)，与列表中的数据一一对应
+        self.shown_ids = set()
+        self.card_order = []
         
         self.create_widgets()
         self.load_products()
+        # 商品变更时只增删受影响的商品，不重新加载整个列表
+        self.product_service.subscribe_changes(self.on_products_changed)
+    
+    def destroy(self):
+        self.product_service.unsubscribe_changes(self.on_products_changed)
+        super().destroy()
     
     def create_widgets(self):
         # 顶部导航栏
@@ -42,6 +108,24 @@ class MainFrame(ttk.Frame):
         search_btn = ttk.Button(search_frame, text="搜索", command=self.search_products)
         search_btn.pack(side="right")
         
+        # 价格区间和排序
+        price_frame = ttk.Frame(self)
+        price_frame.pack(fill="x", padx=20, pady=5)
+        
+        ttk.Label(price_frame, text="价格:").pack(side="left")
+        self.min_price_var = tk.StringVar()
+        ttk.Entry(price_frame, textvariable=self.min_price_var, width=8).pack(side="left", padx=(10, 0))
+        ttk.Label(price_frame, text="-").pack(side="left", padx=5)
+        self.max_price_var = tk.StringVar()
+        ttk.Entry(price_frame, textvariable=self.max_price_var, width=8).pack(side="left")
+        
+        self.sort_var = tk.StringVar(value="最新发布")
+        sort_box = ttk.Combobox(price_frame, textvariable=self.sort_var, state="readonly", width=10,
+                                values=list(self.SORT_OPTIONS))
+        sort_box.pack(side="right")
+        sort_box.bind("<<ComboboxSelected>>", lambda e: self.search_products())
+        ttk.Label(price_frame, text="排序:").pack(side="right", padx=(0, 5))
+        
         # 分类筛选
         category_frame = ttk.Frame(self)
         category_frame.pack(fill="x", padx=20, pady=5)
@@ -68,87 +152,116 @@ class MainFrame(ttk.Frame):
             ttk.Radiobutton(campus_frame, text=campus, value=campus, 
                            variable=self.campus_var, command=self.search_products).pack(side="left", padx=10)
         
-        # 商品列表
-        list_frame = ttk.Frame(self)
-        list_frame.pack(fill="both", expand=True, padx=20, pady=10)
-        
-        # 创建滚动框架
-        self.canvas = tk.Canvas(list_frame)
-        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
-        
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
-        
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-        
-        self.canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        # 商品列表：只为可见区域创建卡片，滚动时复用
+        self.product_list = VirtualList(self, row_height=self.CARD_HEIGHT, create_row=ProductCard,
+                                        bind_row=lambda card, product, index: card.show(product),
+                                        on_reach_end=self.load_more)
+        self.product_list.pack(fill="both", expand=True, padx=20, pady=10)
         
         # 发布按钮
         publish_btn = ttk.Button(self, text="发布商品", command=self.switch_to_publish, style="Accent.TButton")
         publish_btn.pack(pady=10)
     
-    def load_products(self, keyword="", category="全部", campus="全部"):
-        # 清空现有商品
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        
+    def load_products(self, keyword="", category="全部", campus="全部",
+                      min_price=None, max_price=None, sort_by="time"):
         # 获取商品数据 - 显示所有商品，不过滤卖家
         campus_filter = campus if campus != "全部" else ""
-        max_price = None  # 可以根据需要添加价格筛选
         
         category_str = category if category != "全部" else ""
-        products = self.product_service.search_products(keyword, category_str, campus_filter, max_price, show_all=True)
-        
-        # 显示商品
-        for i, product in enumerate(products):
-            self.create_product_card(product, i)
+        self.search_args = dict(keyword=keyword, category=category_str, campus=campus_filter,
+                                max_price=max_price, min_price=min_price, sort_by=sort_by)
+        self.refresh()
     
-    def create_product_card(self, product, index):
-        card_frame = ttk.Frame(self.scrollable_frame, relief="solid", borderwidth=1)
-        card_frame.pack(fill="x", padx=5, pady=5, ipady=5)
-        
-        # 商品标题和价格
-        title_frame = ttk.Frame(card_frame)
-        title_frame.pack(fill="x", padx=10, pady=5)
-        
-        title_label = ttk.Label(title_frame, text=product['title'], font=("Arial", 12, "bold"))
-        title_label.pack(side="left")
-        
-        price_label = ttk.Label(title_frame, text=f"¥{product['price']}", font=("Arial", 12, "bold"), foreground="red")
-        price_label.pack(side="right")
-        
-        # 商品描述
-        desc_label = ttk.Label(card_frame, text=product['description'][:50] + "...")
-        desc_label.pack(anchor="w", padx=10, pady=2)
-        
-        # 商品信息
-        info_frame = ttk.Frame(card_frame)
-        info_frame.pack(fill="x", padx=10, pady=2)
+    def refresh(self):
+        """保持当前筛选条件，从第一页重新加载"""
+        self.next_cursor = None
+        self.has_more = True
+        self.shown_ids = set()
+        self.card_order = []
+        # 清空列表后视口为空，会立即通过 load_more 加载第一页
+        self.product_list.set_items([])
+    
+    def load_more(self):
+        """滚动到已加载商品的末尾时加载下一页"""
+        if self.has_more:
+            self.load_next_page()
+    
+    def load_next_page(self):
+        """加载下一页商品，追加到列表末尾"""
+        page = self.product_service.search_products_page(limit=self.PAGE_SIZE, cursor=self.next_cursor,
+                                                         **self.search_args)
+        self.next_cursor = page["next_cursor"]
+        self.has_more = bool(self.next_cursor)
         
-        # 显示卖家类型（学生/教师）
-        seller_type_color = "#3498db" if product['seller_type'] == "学生" else "#e74c3c"
-        seller_type_label = ttk.Label(
-            info_frame, 
-            text=product['seller_type'],
-            foreground=seller_type_color,
-            font=("Arial", 9, "bold")
-        )
-        seller_type_label.pack(side="left")
-        
-        ttk.Label(info_frame, text=f"卖家: {product['seller_name']}").pack(side="left", padx=(5, 0))
-        ttk.Label(info_frame, text=f"信用: {product['seller_credit']}").pack(side="left", padx=(20, 0))
-        ttk.Label(info_frame, text=f"校区: {product['campus']}").pack(side="right")
+        products = []
+        for product in page["products"]:
+            # 变更事件插入的商品会让按偏移量分页的下一页出现重复商品
+            if product['product_id'] in self.shown_ids:
+                continue
+            self.shown_ids.add(product['product_id'])
+            self.card_order.append((self.product_service.sort_key(product, self.search_args['sort_by']),
+                                    product['product_id']))
+            products.append(product)
+        # 追加后若仍未填满视口，列表会再次回调 load_more
+        self.product_list.append(products)
+    
+    def on_products_changed(self, events):
+        """根据商品变更事件增删列表中的商品"""
+        filters = {name: value for name, value in self.search_args.items() if name != 'sort_by'}
+        for event in events:
+            pid = event.product_id
+            visible = self.product_service.product_matches_search(pid, **filters)
+            if pid in self.shown_ids and visible and event.kind == EVENT_UPDATED:
+                self.update_product_card(self.product_service.get_product(pid))
+            elif pid in self.shown_ids and not visible:
+                self.remove_product_card(pid)
+            elif visible and pid not in self.shown_ids:
+                self.insert_product_card(self.product_service.get_product(pid))
+    
+    def remove_product_card(self, product_id):
+        position = next(i for i, (_, pid) in enumerate(self.card_order) if pid == product_id)
+        del self.card_order[position]
+        self.shown_ids.discard(product_id)
+        self.product_list.remove(position)
+    
+    def update_product_card(self, product):
+        """商品内容变化时原地刷新；排序位置变化时移动到新位置"""
+        position = next(i for i, (_, pid) in enumerate(self.card_order) if pid == product['product_id'])
+        key = self.product_service.sort_key(product, self.search_args['sort_by'])
+        if key == self.card_order[position][0]:
+            self.product_list.update_item(position, product)
+        else:
+            self.remove_product_card(product['product_id'])
+            self.insert_product_card(product)
+    
+    def insert_product_card(self, product):
+        """按当前排序把商品插入到正确位置"""
+        sort_by = self.search_args['sort_by']
+        key = self.product_service.sort_key(product, sort_by)
+        position = len(self.card_order)
+        for i, (other_key, _) in enumerate(self.card_order):
+            if (key < other_key) if sort_by == "price_asc" else (key > other_key):
+                position = i
+                break
+        if position == len(self.card_order) and self.has_more:
+            # 位于已加载的范围之后，翻页时自然会加载到
+            return
+        self.card_order.insert(position, (key, product['product_id']))
+        self.shown_ids.add(product['product_id'])
+        self.product_list.insert(position, product)
     
     def search_products(self):
         keyword = self.search_var.get()
         category = self.category_var.get()
         campus = self.campus_var.get()
-        self.load_products(keyword, category, campus)
+        try:
+            min_price = float(self.min_price_var.get()) if self.min_price_var.get().strip() else None
+            max_price = float(self.max_price_var.get()) if self.max_price_var.get().strip() else None
+        except ValueError:
+            messagebox.showerror("错误", "价格必须是数字")
+            return
+        sort_by = self.SORT_OPTIONS.get(self.sort_var.get(), "time")
+        self.load_products(keyword, category, campus, min_price, max_price, sort_by)
     
     def logout(self):
         self.auth_service.logout()
@@ -2,10 +2,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from src.models.product import Product, ProductCategory
 from src.utils.validators import validate_price, validate_product_title, validate_product_description
+from src.utils.logger import get_logger
 import os
 from PIL import Image, ImageTk
 import base64
 
+logger = get_logger(__name__)
+
 class ProductPublishFrame(ttk.Frame):
     def __init__(self, parent, auth_service, product_service, switch_to_main):
         super().__init__(parent)
@@ -214,7 +217,7 @@ class ProductPublishFrame(ttk.Frame):
                 ttk.Label(img_container, text=f"{i+1}").pack()
                 
             except Exception as e:
-                print(f"加载图片失败: {e}")
+                logger.warning("加载图片失败: %s", e)
                 # 显示错误占位符
                 error_label = ttk.Label(
                     preview_frame, 
@@ -0,0 +1,141 @@
+"""
+虚拟化列表
+所有行高度相同，只为可见区域及上下少量缓冲的行创建控件，滚动时回收
+移出视口的控件并重新绑定到新进入视口的数据，控件数量与数据量无关
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional
+
+
+class VirtualList(ttk.Frame):
+    def __init__(self, parent, row_height: int,
+                 create_row: Callable[[tk.Widget], tk.Widget],
+                 bind_row: Callable[[tk.Widget, Any, int], None],
+                 buffer: int = 3, on_reach_end: Optional[Callable[[], None]] = None,
+                 row_padding: int = 5):
+        """
+        Args:
+            row_height: 每行占用的高度（像素）
+            create_row: 创建一个行控件，参数为父控件
+            bind_row: 把数据显示到行控件上，参数为 (行控件, 数据, 位置)
+            buffer: 视口上下额外保留的行数，滚动时减少闪烁
+            on_reach_end: 滚动到已有数据末尾附近时调用，用于加载下一页
+            row_padding: 行与行之间的间距
+        """
+        super().__init__(parent)
+        self.row_height = row_height
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.buffer = buffer
+        self.on_reach_end = on_reach_end
+        self.row_padding = row_padding
+        self.items: List[Any] = []
+        # 位置 -> (画布窗口ID, 行控件)
+        self._visible: Dict[int, tuple] = {}
+        # 暂时不用的 (画布窗口ID, 行控件)
+        self._free: List[tuple] = []
+
+        # 滚轮每格滚动三分之一行
+        self.canvas = tk.Canvas(self, highlightthickness=0, yscrollincrement=max(row_height // 3, 1))
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<Configure>", self._on_configure)
+        self._bind_wheel(self.canvas)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def set_items(self, items: List[Any]):
+        """替换全部数据并回到顶部"""
+        self.items = list(items)
+        self.canvas.yview_moveto(0)
+        self._rebind_all()
+
+    def append(self, items: List[Any]):
+        """在末尾追加数据，已显示的行不受影响"""
+        self.items.extend(items)
+        self._refresh()
+
+    def insert(self, index: int, item: Any):
+        self.items.insert(index, item)
+        self._rebind_all()
+
+    def remove(self, index: int):
+        del self.items[index]
+        self._rebind_all()
+
+    def update_item(self, index: int, item: Any):
+        self.items[index] = item
+        if index in self._visible:
+            self.bind_row(self._visible[index][1], item, index)
+
+    def _rebind_all(self):
+        # 插入或删除后位置整体移动，回收全部行重新分配
+        for index in list(self._visible):
+            self._release(index)
+        self._refresh()
+
+    def _release(self, index: int):
+        window_id, row = self._visible.pop(index)
+        self.canvas.itemconfigure(window_id, state="hidden")
+        self._free.append((window_id, row))
+
+    def _acquire(self, index: int):
+        if self._free:
+            window_id, row = self._free.pop()
+            self.canvas.itemconfigure(window_id, state="normal")
+        else:
+            row = self.create_row(self.canvas)
+            self._bind_wheel(row)
+            window_id = self.canvas.create_window(0, 0, window=row, anchor="nw")
+        self.canvas.coords(window_id, 0, index * self.row_height)
+        self.canvas.itemconfigure(window_id, width=self.canvas.winfo_width(),
+                                  height=self.row_height - self.row_padding)
+        self.bind_row(row, self.items[index], index)
+        self._visible[index] = (window_id, row)
+
+    def _visible_range(self):
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), 1)
+        first = max(int(top // self.row_height) - self.buffer, 0)
+        last = min(int((top + height) // self.row_height) + self.buffer + 1, len(self.items))
+        return first, last
+
+    def _refresh(self):
+        total_height = len(self.items) * self.row_height
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), total_height))
+        first, last = self._visible_range()
+        for index in [index for index in self._visible if not first <= index < last]:
+            self._release(index)
+        for index in range(first, last):
+            if index not in self._visible:
+                self._acquire(index)
+        if self.on_reach_end is not None and last >= len(self.items) - self.buffer:
+            self.on_reach_end()
+
+    def _bind_wheel(self, widget):
+        # 滚轮事件发给指针下的控件，行内的每个子控件都要绑定
+        # Windows/macOS 为 <MouseWheel>，X11 为 Button-4/5
+        widget.bind("<MouseWheel>", lambda e: self._scroll_units(-1 if e.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda e: self._scroll_units(-1))
+        widget.bind("<Button-5>", lambda e: self._scroll_units(1))
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self._refresh()
+
+    def _scroll_units(self, units: int):
+        self.canvas.yview_scroll(units, "units")
+        self._refresh()
+
+    def _on_configure(self, event):
+        for window_id, _ in list(self._visible.values()) + self._free:
+            self.canvas.itemconfigure(window_id, width=event.width)
+        self._refresh()
@@ -0,0 +1,80 @@
+"""
+并发工具
+"""
+
+import threading
+from contextlib import contextmanager, nullcontext
+
+
+class ReadWriteLock:
+    """读写锁
+
+    多个读者可以同时持有，写者独占。有写者在等待时新来的读者排队，
+    避免持续的查询让写者饿死。同一线程可以重复获取读锁，写锁不可重入。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+        # 当前线程持有读锁的层数
+        self._local = threading.local()
+
+    def acquire_read(self):
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            with self._cond:
+                while self._writing or self._waiting_writers:
+                    self._cond.wait()
+                self._readers += 1
+        self._local.depth = depth + 1
+
+    def release_read(self):
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writing or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writing = True
+
+    def release_write(self):
+        with self._cond:
+            self._writing = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class NullReadWriteLock:
+    """不加锁的占位实现，单线程使用时避免加锁开销"""
+
+    def read_locked(self):
+        return nullcontext()
+
+    def write_locked(self):
+        return nullcontext()
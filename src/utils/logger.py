@@ -0,0 +1,43 @@
+"""
+日志工具模块
+统一使用标准库 logging，消息采用 % 占位符延迟格式化，
+未开启对应级别时不产生格式化和输出开销
+"""
+
+import logging
+import os
+
+# 所有模块日志的根名称
+ROOT_LOGGER_NAME = "campus_market"
+
+# 通过环境变量调整日志级别，例如 CAMPUS_MARKET_LOG_LEVEL=DEBUG
+LOG_LEVEL_ENV = "CAMPUS_MARKET_LOG_LEVEL"
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    获取模块日志对象
+
+    Args:
+        name: 模块名，通常传入 __name__
+
+    Returns:
+        logging.Logger: 挂在 campus_market 根日志下的日志对象
+    """
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def configure_logging(level: str = None) -> None:
+    """
+    配置应用日志输出，只需在程序入口调用一次
+
+    Args:
+        level: 日志级别名称，默认读取环境变量，未设置时为 WARNING
+    """
+    level = (level or os.environ.get(LOG_LEVEL_ENV) or "WARNING").upper()
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(getattr(logging, level, logging.WARNING))
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        root.addHandler(handler)
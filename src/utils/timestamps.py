@@ -0,0 +1,57 @@
+"""
+时间戳压缩工具
+把 "YYYY-mm-dd HH:MM:SS" 格式的时间字符串压缩为整数秒保存，需要时再还原，
+不涉及时区换算，还原结果与原字符串逐字节一致
+"""
+
+import re
+from datetime import date
+from typing import Optional, Union
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# 各字段位数固定且只含 ASCII 数字时，还原结果必然与原字符串一致
+_LAYOUT = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', re.ASCII)
+
+
+def pack_timestamp(value: Optional[str]) -> Union[int, str, None]:
+    """
+    压缩时间字符串
+
+    Args:
+        value: 时间字符串
+
+    Returns:
+        能精确还原时返回整数秒，否则原样返回
+    """
+    # 分隔符或数字写法不规范时无法逐字节还原，保留原字符串
+    if not isinstance(value, str) or not _LAYOUT.fullmatch(value):
+        return value
+    try:
+        days = date(int(value[0:4]), int(value[5:7]), int(value[8:10])).toordinal() - _EPOCH_ORDINAL
+        hour, minute, second = int(value[11:13]), int(value[14:16]), int(value[17:19])
+    except ValueError:
+        return value
+    if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+        return value
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+def unpack_timestamp(value: Union[int, str, None]) -> Optional[str]:
+    """
+    还原 pack_timestamp 的结果
+
+    Args:
+        value: 整数秒或未压缩的原值
+
+    Returns:
+        时间字符串，未压缩的值原样返回
+    """
+    if not isinstance(value, int):
+        return value
+    days, seconds = divmod(value, 86400)
+    day = date.fromordinal(days + _EPOCH_ORDINAL)
+    hour, seconds = divmod(seconds, 3600)
+    minute, second = divmod(seconds, 60)
+    return f"{day.year:04d}-{day.month:02d}-{day.day:02d} {hour:02d}:{minute:02d}:{second:02d}"
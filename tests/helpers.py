@@ -0,0 +1,8 @@
+from src.models.product import Product, ProductCategory
+
+
+def make_product(pid, title=None, description=None, price=10, category=ProductCategory.OTHER,
+                 campus="主校区", seller_id="1"):
+    """测试用商品，标题和描述默认带上商品ID"""
+    return Product(pid, title or f"商品{pid}", description or f"描述{pid}", price, category,
+                   seller_id, campus)
@@ -0,0 +1,103 @@
+import json
+import os
+import pytest
+from src.models.product import ProductManager
+from src.models.user import UserManager
+from src.storage.atomic import atomic_write
+from src.storage.coalescer import WriteCoalescer
+from tests.helpers import make_product
+
+
+def test_failed_save_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "data.json")
+    with atomic_write(path) as f:
+        f.write('{"1": {}}')
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write('{"1": {}, "2"')
+            raise RuntimeError("写到一半崩溃")
+
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"1": {}}
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_atomic_write_keeps_file_permissions(tmp_path):
+    from src.storage.atomic import _UMASK
+
+    path = str(tmp_path / "data.json")
+    with atomic_write(path) as f:
+        f.write("{}")
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~_UMASK
+
+    os.chmod(path, 0o640)
+    with atomic_write(path) as f:
+        f.write("{}")
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+
+def test_corrupt_file_is_backed_up(tmp_path):
+    data_file = tmp_path / "products.json"
+    data_file.write_text('{"1": {"product_id": "1", "tit', encoding="utf-8")
+    manager = ProductManager(str(data_file))
+    assert manager.products == {}
+    backups = [name for name in os.listdir(tmp_path) if name.startswith("products.json.corrupt-")]
+    assert len(backups) == 1
+    assert (tmp_path / backups[0]).read_text(encoding="utf-8").startswith('{"1"')
+
+    users_file = tmp_path / "users.json"
+    users_file.write_text("{", encoding="utf-8")
+    assert UserManager(str(users_file)).users == {}
+    assert any(name.startswith("users.json.corrupt-") for name in os.listdir(tmp_path))
+
+
+def test_coalescer_batches_marks_within_window():
+    flushed = []
+    coalescer = WriteCoalescer(flushed.append, delay=60)
+    coalescer.mark(["1", "2"])
+    coalescer.mark(["2", "3"])
+    assert flushed == []
+    assert coalescer.is_pending("3")
+    coalescer.flush()
+    assert flushed == [["1", "2", "3"]]
+    assert coalescer.pending_count == 0
+
+    immediate = WriteCoalescer(flushed.append)
+    immediate.mark(["4"])
+    assert flushed[-1] == ["4"]
+
+
+def test_burst_of_approvals_is_saved_once(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    manager = ProductManager(data_file, save_delay=60, thread_safe=True)
+    saves = []
+    original_save = manager.storage.save
+    manager.storage.save = lambda changes, snapshot: (saves.append(set(changes)), original_save(changes, snapshot))
+    for i in range(50):
+        manager.add_product(make_product(str(i)))
+    for i in range(50):
+        manager.approve_product(str(i))
+    assert saves == []
+    manager.flush()
+    assert saves == [{str(i) for i in range(50)}]
+    assert len(ProductManager(data_file).products) == 50
+
+    # 计时线程写入时使用空锁会与主线程的修改竞争
+    with pytest.raises(ValueError):
+        ProductManager(data_file, save_delay=1)
+
+
+def test_lazy_eviction_skips_unflushed_products(tmp_path):
+    manager = ProductManager(str(tmp_path / "products.json"), storage_mode="sqlite",
+                             lazy_details=True, detail_cache_size=2, save_delay=60,
+                             thread_safe=True)
+    for i in range(5):
+        manager.add_product(make_product(str(i)))
+    # 还没有写入存储，详情不能被丢弃
+    assert all(manager.products[str(i)].description == f"描述{i}" for i in range(5))
+    manager.flush()
+    manager.add_product(make_product("5"))
+    manager.flush()
+    assert manager.products["0"].description == "描述0"
+    assert len(manager._hydrated) <= 2
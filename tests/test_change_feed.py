@@ -0,0 +1,122 @@
+import threading
+from src.models.product import (EVENT_ADDED, EVENT_APPROVED, EVENT_UPDATED, ProductCategory, ProductManager,
+                                ProductStatus)
+from src.models.user import UserManager
+from src.services.product_service import ProductService
+from tests.helpers import make_product
+
+
+def test_events_are_batched_and_sequenced(tmp_path):
+    manager = ProductManager(str(tmp_path / "products.json"))
+    batches = []
+    manager.subscribe(batches.append)
+
+    manager.add_products([make_product("1"), make_product("2")])
+    manager.approve_products(["1", "2", "不存在"])
+    assert [[(e.seq, e.kind, e.product_id) for e in batch] for batch in batches] == [
+        [(1, EVENT_ADDED, "1"), (2, EVENT_ADDED, "2")],
+        [(3, EVENT_APPROVED, "1"), (4, EVENT_APPROVED, "2")],
+    ]
+    assert batches[1][0].status == ProductStatus.ON_SALE
+    assert batches[1][0].old_status == ProductStatus.PENDING
+
+    assert [e.seq for e in manager.changes_since(2)] == [3, 4]
+    assert manager.changes_since(manager.change_seq) == []
+
+    manager.unsubscribe(batches.append)
+    manager.add_product(make_product("3"))
+    assert len(batches) == 2
+
+
+def test_changes_since_reports_truncated_log(tmp_path):
+    manager = ProductManager(str(tmp_path / "products.json"), change_log_size=2)
+    for pid in "123":
+        manager.add_product(make_product(pid))
+    assert [e.product_id for e in manager.changes_since(1)] == ["2", "3"]
+    assert manager.changes_since(0) is None
+
+
+def test_bound_method_subscribers_are_weak(tmp_path):
+    manager = ProductManager(str(tmp_path / "products.json"))
+
+    class View:
+        def __init__(self):
+            self.events = []
+
+        def on_changed(self, events):
+            self.events.extend(events)
+
+    view = View()
+    manager.subscribe(view.on_changed)
+    manager.add_product(make_product("1"))
+    assert len(view.events) == 1
+    del view
+    manager.add_product(make_product("2"))
+    assert manager._subscribers == []
+
+
+def test_external_changes_arrive_as_events(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    first = ProductManager(data_file)
+    second = ProductManager(data_file)
+    first.add_product(make_product("1"))
+    first.approve_product("1")
+
+    events = []
+    second.subscribe(events.extend)
+    assert second.reload_if_changed()
+    assert [(e.kind, e.product_id, e.status) for e in events] == [(EVENT_ADDED, "1", ProductStatus.ON_SALE)]
+
+    first.add_product(make_product("2"))
+    events.clear()
+    second.reload_if_changed()
+    assert [(e.kind, e.product_id) for e in events] == [(EVENT_ADDED, "2")]
+    assert EVENT_UPDATED not in {e.kind for e in events}
+
+
+def test_service_helpers_for_views(tmp_path):
+    manager = ProductManager(str(tmp_path / "products.json"))
+    service = ProductService(manager, UserManager(str(tmp_path / "users.json")))
+    manager.add_product(make_product("1", "台灯", price=15, category=ProductCategory.DAILY))
+    assert not service.product_matches_search("1")
+    manager.approve_product("1")
+    assert service.product_matches_search("1", keyword="台", category="生活用品", max_price=20)
+    assert not service.product_matches_search("1", campus="东校区")
+    assert not service.product_matches_search("1", min_price=20)
+
+    product = service.get_product("1")
+    assert product["seller_name"] == "未知用户"
+    assert service.sort_key(product, "price_asc") == (15, "1")
+    assert service.get_product("不存在") is None
+
+
+def test_events_from_other_threads_wait_for_owner(tmp_path):
+    manager = ProductManager(str(tmp_path / "products.json"), thread_safe=True)
+    batches = []
+    manager.subscribe(batches.append)
+
+    # 其他线程的修改（如延迟写入时合并的外部数据）不在该线程中通知订阅者
+    worker = threading.Thread(target=manager.add_product, args=(make_product("1"),))
+    worker.start()
+    worker.join()
+    assert batches == []
+    assert manager.reload_if_changed() is False
+    assert [[(e.kind, e.product_id) for e in batch] for batch in batches] == [[(EVENT_ADDED, "1")]]
+
+
+def test_failing_subscriber_does_not_lose_writes(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    manager = ProductManager(data_file)
+    batches = []
+
+    def broken(events):
+        raise RuntimeError("界面已销毁")
+
+    manager.subscribe(broken)
+    manager.subscribe(batches.append)
+    assert manager.add_products([make_product("1")]) == ["1"]
+    assert manager.approve_products(["1"]) == ["1"]
+
+    # 出错的订阅者之后的订阅者照常收到事件，修改都已写入
+    assert [[e.kind for e in batch] for batch in batches] == [[EVENT_ADDED], [EVENT_APPROVED]]
+    assert ProductManager(data_file).products["1"].status == ProductStatus.ON_SALE
@@ -0,0 +1,105 @@
+import threading
+import time
+import pytest
+from src.models.product import ProductManager, ProductStatus
+from src.utils.concurrency import ReadWriteLock
+from tests.helpers import make_product
+
+
+def test_readers_share_and_writer_excludes():
+    lock = ReadWriteLock()
+    events = []
+    lock.acquire_read()
+    lock.acquire_read()  # 同一线程可重复获取读锁
+
+    def writer():
+        with lock.write_locked():
+            events.append("write")
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(0.05)
+    assert events == []
+
+    # 有写者等待时，其他线程的新读者排在写者之后
+    def reader():
+        with lock.read_locked():
+            events.append("read")
+
+    reader_thread = threading.Thread(target=reader)
+    reader_thread.start()
+    time.sleep(0.05)
+    assert events == []
+
+    lock.release_read()
+    lock.release_read()
+    thread.join(1)
+    reader_thread.join(1)
+    assert events == ["write", "read"]
+
+
+@pytest.mark.parametrize("storage_mode", ["journal", "sqlite"])
+def test_searches_during_writes_see_consistent_catalog(tmp_path, storage_mode):
+    # journal 模式查询内存索引，sqlite 模式在数据库中查询
+    manager = ProductManager(str(tmp_path / "products.json"), storage_mode=storage_mode, thread_safe=True)
+    errors = []
+    done = threading.Event()
+
+    def write():
+        try:
+            for i in range(150):
+                manager.add_product(make_product(str(i), f"台灯{i}", price=i % 50 + 1))
+                manager.approve_product(str(i))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def read():
+        try:
+            while not done.is_set():
+                results = manager.search_products(keyword="台灯", sort_by="price_asc")
+                assert all(p.status == ProductStatus.ON_SALE for p in results)
+                prices = [p.price for p in results]
+                assert prices == sorted(prices)
+                manager.get_products_by_status(ProductStatus.PENDING)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert errors == []
+    assert len(manager.search_products()) == 150
+
+
+def test_search_not_blocked_by_slow_save(tmp_path):
+    manager = ProductManager(str(tmp_path / "products.json"), thread_safe=True)
+    manager.add_product(make_product("1", "台灯1"))
+    original_save = manager.storage.save
+    saving = threading.Event()
+    release = threading.Event()
+
+    def blocked_save(changes, snapshot):
+        records = snapshot()
+        saving.set()
+        # 保存一直阻塞，直到查询完成后才放行
+        release.wait(10)
+        original_save(changes, lambda: records)
+
+    manager.storage.save = blocked_save
+    writer = threading.Thread(target=manager.approve_product, args=("1",))
+    writer.start()
+    assert saving.wait(5)
+    results = []
+    searcher = threading.Thread(target=lambda: results.extend(manager.search_products()))
+    searcher.start()
+    searcher.join(5)
+    # 查询在保存仍被阻塞时就已完成
+    assert not searcher.is_alive()
+    assert writer.is_alive()
+    assert [p.product_id for p in results] == ["1"]
+    release.set()
+    writer.join()
@@ -0,0 +1,44 @@
+from src.models.product import Product, ProductCategory, ProductManager
+from src.models.user import UserManager
+from src.services.product_service import ProductService
+from src.storage.id_allocator import IdAllocator
+
+
+def test_allocators_sharing_file_reserve_disjoint_blocks(tmp_path):
+    seq_file = str(tmp_path / "products.seq")
+    first = IdAllocator(seq_file, block_size=3)
+    second = IdAllocator(seq_file, block_size=3)
+    ids = [first.next_id(), second.next_id(), first.next_id(), first.next_id(), first.next_id(), second.next_id()]
+    assert ids == ["1", "4", "2", "3", "7", "5"]
+    assert (tmp_path / "products.seq").read_text(encoding="utf-8") == "9"
+
+    # 没有序列文件的旧数据从已有最大ID之后开始分配
+    legacy = IdAllocator(str(tmp_path / "users.seq"), floor=41)
+    assert legacy.next_id() == "42"
+    legacy.observe("100")
+    assert legacy.next_id() == "101"
+
+
+def test_add_product_rejects_overwrite(tmp_path):
+    manager = ProductManager(str(tmp_path / "products.json"))
+    assert manager.add_product(Product("1", "台灯", "宿舍台灯", 15, ProductCategory.DAILY, "1", "主校区"))
+    assert not manager.add_product(Product("1", "鼠标", "无线鼠标", 30, ProductCategory.ELECTRONICS, "1", "主校区"))
+    assert manager.products["1"].title == "台灯"
+    assert manager.next_product_id() == "2"
+
+
+def test_separate_service_instances_do_not_collide(tmp_path):
+    users = UserManager(str(tmp_path / "users.json"))
+    services = [ProductService(ProductManager(str(tmp_path / "products.json")), users) for _ in range(2)]
+    ids = set()
+    for i in range(10):
+        result = services[i % 2].publish_product(f"商品{i}", "描述", 10, ProductCategory.OTHER, "1", "主校区", "全新")
+        assert result["success"] is True
+        ids.add(result["product"].product_id)
+    assert len(ids) == 10
+
+    assert users.register_user("a", "abc123", "a@test.com", "主校区")
+    del users.users["1"]
+    assert users.register_user("b", "abc123", "b@test.com", "主校区")
+    assert users.get_user_by_username("b").user_id == "2"
+    assert UserManager(str(tmp_path / "users.json")).id_allocator.next_id() not in {"1", "2"}
@@ -46,3 +46,19 @@ def test_integration_user_publish_and_search_product():
     # 5. 搜索商品
     results = product_service.search_products(keyword="集成测试商品")
     assert any(p["product_id"] == product_id for p in results)
+
+
+def test_services_share_user_manager():
+    auth = AuthService()
+    product_service = ProductService()
+    assert auth.user_manager is product_service.user_manager
+
+    username = f"shared_{uuid.uuid4().hex[:8]}"
+    auth.register(username, "abc123", f"{username}@test.com", "主校区")
+    user = auth.login(username, "abc123")["user"]
+
+    result = product_service.publish_product("共享测试商品", "用于测试共享用户数据", 10,
+                                             ProductCategory.BOOKS, user.user_id, "主校区", "全新")
+    product_service.approve_product(result["product"].product_id)
+    results = product_service.search_products(keyword="共享测试商品")
+    assert any(p["seller_name"] == username for p in results)
@@ -0,0 +1,67 @@
+import json
+import pytest
+from src.models.product import Product, ProductManager, ProductCategory
+from src.storage.json_stream import iter_json_lines, iter_json_object
+
+
+def test_iter_json_object_matches_json_load(tmp_path):
+    data = {str(i): {"title": f"商品{i}" * (i % 7), "price": i * 1.5, "tags": [i, None, True]} for i in range(300)}
+    data["特殊"] = {"title": "带\"引号\"和\\n转义", "price": 12345678901234567890}
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    progress = []
+    # 很小的块可以覆盖多字节字符和数字被块边界截断的情况
+    items = list(iter_json_object(str(path), chunk_size=7, progress=lambda done, total: progress.append(done)))
+    assert dict(items) == data
+    assert progress[-1] == path.stat().st_size
+
+    path.write_text("{}", encoding="utf-8")
+    assert list(iter_json_object(str(path))) == []
+
+
+def test_iter_json_object_rejects_truncated_file(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('{"1": {"title": "a"}, "2": {"ti', encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_object(str(path)))
+
+
+def test_iter_json_lines(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text('{"id": "1", "v": "一"}\n\n{"id": "2", "v": "二"}\n', encoding="utf-8")
+    assert list(iter_json_lines(str(path), "id")) == [("1", {"id": "1", "v": "一"}), ("2", {"id": "2", "v": "二"})]
+
+
+def test_product_manager_jsonl_mode(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    manager = ProductManager(data_file, storage_mode="jsonl")
+    manager.add_product(Product("1", "台灯", "宿舍台灯", 15, ProductCategory.DAILY, "1", "主校区"))
+    manager.add_product(Product("2", "鼠标", "无线鼠标", 30, ProductCategory.ELECTRONICS, "1", "主校区"))
+
+    reloaded = ProductManager(data_file, storage_mode="jsonl")
+    assert [p.to_dict() for p in reloaded.products.values()] == [p.to_dict() for p in manager.products.values()]
+    assert (tmp_path / "products.jsonl").read_text(encoding="utf-8").count("\n") == 2
+
+
+def test_binary_snapshot_preferred_when_fresh(tmp_path):
+    import os
+    from src.storage.snapshot import iter_snapshot, write_snapshot
+
+    records = {"1": {"a": "主校区", "b": 1.5, "c": [1]}, "2": {"a": "主校区", "b": 2, "c": []},
+               "3": {"a": "东校区"}}
+    write_snapshot(str(tmp_path / "x.snap"), records)
+    assert dict(iter_snapshot(str(tmp_path / "x.snap"))) == records
+
+    data_file = str(tmp_path / "products.json")
+    manager = ProductManager(data_file, binary_snapshot=True)
+    manager.add_product(Product("1", "台灯", "宿舍台灯", 15, ProductCategory.DAILY, "1", "主校区"))
+    assert os.path.exists(data_file + ".snap")
+
+    reloaded = ProductManager(data_file, binary_snapshot=True)
+    assert reloaded.products["1"].to_dict() == manager.products["1"].to_dict()
+
+    # 快照损坏时退回读取 JSON
+    with open(data_file + ".snap", "wb") as f:
+        f.write(b"CMSNAP01broken")
+    assert "1" in ProductManager(data_file, binary_snapshot=True).products
@@ -0,0 +1,99 @@
+from src.models.product import Product, ProductCategory, ProductManager, ProductStatus, encode_cursor
+from src.models.product_catalog import CatalogProductManager
+from src.models.user import UserManager
+from src.services.product_service import ProductService
+from src.storage.mmap_catalog import MmapCatalog, publish_catalog
+from tests.test_product_index import build_manager
+
+
+def test_publish_and_read_catalog(tmp_path):
+    path = str(tmp_path / "products.catalog")
+    records = {
+        "2": {"product_id": "2", "title": "台灯", "description": "", "price": 15.5, "category": "生活用品",
+              "seller_id": "1", "campus": "主校区", "status": "在售", "create_time": None,
+              "images": ["a.png"], "view_count": 3, "like_count": 0},
+        "10": {"product_id": "10", "title": "鼠标\"无线\"", "description": "九成新", "price": 30,
+               "category": "电子数码", "seller_id": "2", "campus": "主校区", "status": "待审核",
+               "create_time": "2024-01-01 10:00:00", "images": [], "view_count": 0, "like_count": 1},
+    }
+    publish_catalog(path, records)
+
+    catalog = MmapCatalog(path)
+    assert len(catalog) == 2
+    assert list(catalog.keys()) == ["10", "2"]
+    assert catalog.get("2")["images"] == ["a.png"]
+    assert catalog.get("2")["create_time"] is None
+    assert catalog.get("10")["title"] == "鼠标\"无线\""
+    assert catalog.get("3") is None
+    assert catalog.reload_if_changed() is False
+    # 排序表按 (发布时间, ID) 和 (价格, ID) 升序，None 时间排在最前
+    assert [catalog.key(index) for index in catalog.ordered("time")] == ["2", "10"]
+    assert [catalog.key(index) for index in catalog.ordered("price", reverse=True)] == ["10", "2"]
+    assert catalog.bisect("price", (20.0, "")) == 1
+    assert catalog.bisect("time", ("", "2"), right=True) == 1
+
+    # 重新发布后检测到文件被替换
+    del records["10"]
+    publish_catalog(path, records)
+    assert catalog.reload_if_changed() is True
+    assert list(catalog.keys()) == ["2"]
+    catalog.close()
+
+    # 文件不存在时为空目录
+    assert len(MmapCatalog(str(tmp_path / "missing.catalog"))) == 0
+
+
+def test_catalog_manager_matches_writer(tmp_path):
+    catalog_file = str(tmp_path / "products.catalog")
+    writer = build_manager(tmp_path, count=120, catalog_file=catalog_file)
+    writer.flush()
+    reader = CatalogProductManager(catalog_file)
+
+    assert len(reader.products) == len(writer.products)
+    assert reader.products["5"].to_dict() == writer.products["5"].to_dict()
+    for kwargs in [{}, {"keyword": "二手"}, {"category": ProductCategory.BOOKS, "campus": "东校区"},
+                   {"min_price": 100, "max_price": 300, "sort_by": "price_asc"},
+                   {"min_price": 100, "max_price": 300, "sort_by": "price_desc", "limit": 4},
+                   {"keyword": "py", "sort_by": "price_desc", "limit": 5, "offset": 2},
+                   {"limit": 7}]:
+        expected = writer.search_products(**kwargs)
+        actual = reader.search_products(**kwargs)
+        assert [p.product_id for p in actual] == [p.product_id for p in expected], kwargs
+
+    for sort_by in ["time", "price_asc", "price_desc"]:
+        first_page = reader.search_products(sort_by=sort_by, limit=10)
+        cursor = encode_cursor(first_page[-1], sort_by=sort_by)
+        assert [p.product_id for p in reader.search_products(sort_by=sort_by, limit=10, cursor=cursor)] == \
+            [p.product_id for p in writer.search_products(sort_by=sort_by, limit=10, offset=10)]
+    assert {p.product_id for p in reader.get_products_by_status(ProductStatus.PENDING)} == \
+        {p.product_id for p in writer.get_products_by_status(ProductStatus.PENDING)}
+    assert reader.add_product(Product("x", "t", "d", 1, ProductCategory.OTHER, "1", "主校区")) is False
+    service = ProductService(reader, UserManager(str(tmp_path / "users.json")))
+    assert service.publish_product("台灯", "宿舍台灯", 15, ProductCategory.DAILY, "1", "主校区", "九成新") == \
+        {"success": False, "message": "商品发布失败"}
+
+    # 写入方保存后，只读方下一次查询即看到新数据
+    generation = reader.generation
+    pending = writer.get_products_by_status(ProductStatus.PENDING)[0]
+    writer.approve_product(pending.product_id)
+    writer.flush()
+    assert reader.reload_if_changed() is True
+    assert reader.reload_if_changed() is False
+    assert reader.generation != generation
+    assert pending.product_id in {p.product_id for p in reader.search_products()}
+
+
+def test_catalog_publishing_is_debounced(tmp_path):
+    catalog_file = str(tmp_path / "products.catalog")
+    writer = ProductManager(str(tmp_path / "products.json"), catalog_file=catalog_file, catalog_delay=60)
+    published = []
+    original_publish = writer.publish_catalog
+    writer.publish_catalog = lambda: published.append(len(writer.products)) or original_publish()
+
+    for i in range(5):
+        writer.add_product(Product(str(i), "台灯", "宿舍台灯", 15, ProductCategory.DAILY, "1", "主校区"))
+    # 保存已经完成，目录等待窗口结束后在后台发布
+    assert published == []
+    writer.flush()
+    assert published == [5]
+    assert len(CatalogProductManager(catalog_file).products) == 5
@@ -0,0 +1,76 @@
+import json
+import os
+from src.models.product import Product
+from src.models.user import User
+from src.utils.timestamps import pack_timestamp, unpack_timestamp
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "campus_market", "data")
+
+
+def test_timestamp_roundtrip():
+    for value in ["2024-01-10 15:20:00", "1999-12-31 23:59:59", "1960-02-29 00:00:01"]:
+        packed = pack_timestamp(value)
+        assert isinstance(packed, int)
+        assert unpack_timestamp(packed) == value
+    for value in [None, "", "2024-1-10 15:20:00", "2024-01-10T15:20:00", "2024-02-30 10:00:00",
+                  "0000-01-01 00:00:00", "+024-01-10 15:20:00", "2024-01-10 15:20:0\u0660"]:
+        assert pack_timestamp(value) == value
+
+
+def test_product_dict_roundtrip_is_byte_compatible():
+    with open(os.path.join(SAMPLE_DIR, "products.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    data["custom"] = dict(next(iter(data.values())), product_id="custom", create_time="2024/01/01")
+    data["no_time"] = dict(next(iter(data.values())), product_id="no_time", create_time=None)
+
+    for record in data.values():
+        product = Product.from_dict(record)
+        assert not hasattr(product, "__dict__")
+        assert json.dumps(product.to_dict(), ensure_ascii=False) == json.dumps(record, ensure_ascii=False)
+
+
+def test_user_dict_roundtrip_is_byte_compatible():
+    with open(os.path.join(SAMPLE_DIR, "users.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    for record in data.values():
+        user = User.from_dict(record)
+        assert not hasattr(user, "__dict__")
+        assert user.to_dict() == record
+
+
+def test_lazy_details_loaded_on_demand(tmp_path):
+    import pytest
+    from src.models.product import ProductManager, ProductCategory, _NOT_LOADED
+
+    data_file = str(tmp_path / "products.json")
+    writer = ProductManager(data_file, storage_mode="sqlite")
+    for i in range(10):
+        product = Product(str(i), f"商品{i}", f"第{i}个商品的详细描述", 10 + i, ProductCategory.BOOKS, "1", "主校区")
+        product.images = [f"img{i}.png"]
+        writer.add_product(product)
+        writer.approve_product(str(i))
+
+    manager = ProductManager(data_file, storage_mode="sqlite", lazy_details=True, detail_cache_size=3)
+    assert len(manager._hydrated) == 0
+    assert all("description" not in record for _, record in manager.storage.iter_summaries(("description", "images")))
+    # 描述中的关键词在数据库中匹配，不加载任何商品的详情
+    assert [p.product_id for p in manager.search_products(keyword="第5个")] == ["5"]
+    assert len(manager._hydrated) == 0
+
+    for i in range(10):
+        product = manager.products[str(i)]
+        assert product.description == f"第{i}个商品的详细描述"
+        assert product.images == [f"img{i}.png"]
+        assert product.to_dict() == writer.products[str(i)].to_dict()
+    assert list(manager._hydrated) == ["7", "8", "9"]
+
+    manager.add_product(Product("10", "新商品", "新发布的商品描述", 5, ProductCategory.BOOKS, "1", "主校区"))
+    assert list(manager._hydrated) == ["8", "9", "10"]
+    assert manager.products["7"]._description is _NOT_LOADED
+
+    # 批量审核写出时会重新加载整批详情，写出完成后淘汰回上限以内
+    manager.approve_products([str(i) for i in range(11)])
+    assert len(manager._hydrated) <= 3
+
+    with pytest.raises(ValueError):
+        ProductManager(str(tmp_path / "other.json"), lazy_details=True)
@@ -0,0 +1,118 @@
+import multiprocessing
+import sqlite3
+import pytest
+from src.models.product import EVENT_ADDED, EVENT_REMOVED, ProductManager
+from src.models.user import UserManager
+from src.storage import file_lock
+from tests.helpers import make_product
+
+
+def test_writers_merge_instead_of_clobbering(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    first = ProductManager(data_file)
+    second = ProductManager(data_file)
+    assert first.reload_if_changed() is False
+
+    first.add_product(make_product(first.next_product_id(), "台灯"))
+    # second 保存前发现文件已被 first 改写，先合并再写回
+    second.add_product(make_product(second.next_product_id(), "鼠标"))
+    assert {p.title for p in ProductManager(data_file).products.values()} == {"台灯", "鼠标"}
+    assert {p.title for p in second.products.values()} == {"台灯", "鼠标"}
+
+    generation = first.generation
+    assert first.reload_if_changed() is True
+    assert first.generation > generation
+    assert {p.title for p in first.get_products_by_seller("1")} == {"台灯", "鼠标"}
+    assert first.reload_if_changed() is False
+
+
+@pytest.mark.parametrize("storage_mode", ["json", "sqlite"])
+def test_user_registrations_from_two_managers(tmp_path, storage_mode):
+    users_file = str(tmp_path / "users.json")
+    first = UserManager(users_file, storage_mode=storage_mode)
+    second = UserManager(users_file, storage_mode=storage_mode)
+    assert first.register_user("alice", "abc123", "alice@test.com", "主校区")
+    assert second.register_user("bob", "abc123", "bob@test.com", "主校区")
+    # 注册前会读入其他实例的用户，重名被拒绝
+    assert not second.register_user("alice", "abc123", "other@test.com", "主校区")
+    assert first.reload_if_changed() is True
+    assert first.get_user_by_username("bob") is not None
+    assert set(UserManager(users_file, storage_mode=storage_mode).username_index) == {"alice", "bob"}
+
+
+def test_lazy_reload_only_applies_real_changes(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    writer = ProductManager(data_file, storage_mode="sqlite")
+    writer.add_products([make_product(str(i)) for i in range(20)])
+    writer.approve_products([str(i) for i in range(20)])
+    reader = ProductManager(data_file, storage_mode="sqlite", lazy_details=True, detail_cache_size=2)
+    assert reader.products["1"].description == "描述1"
+    events = []
+    reader.subscribe(events.extend)
+
+    # 只有新增的商品产生事件，未变化的商品不会被替换
+    writer.add_product(make_product("20"))
+    assert reader.reload_if_changed()
+    assert [(e.kind, e.product_id) for e in events] == [(EVENT_ADDED, "20")]
+
+    # 其他连接删除了已加载详情的商品
+    conn = sqlite3.connect(str(tmp_path / "products.db"))
+    with conn:
+        conn.execute("DELETE FROM products WHERE id = '1'")
+    conn.close()
+    events.clear()
+    assert reader.reload_if_changed()
+    assert [(e.kind, e.product_id) for e in events] == [(EVENT_REMOVED, "1")]
+    assert "1" not in reader._hydrated
+    for i in range(21, 26):
+        assert reader.add_product(make_product(str(i)))
+    assert "1" not in {p.product_id for p in reader.search_products(keyword="描述1")}
+
+
+def _add_products(data_file, prefix, count):
+    manager = ProductManager(data_file)
+    for i in range(count):
+        manager.add_product(make_product(manager.next_product_id(), f"{prefix}{i}"))
+
+
+@pytest.mark.skipif(file_lock.fcntl is None, reason="需要 fcntl")
+def test_concurrent_processes_keep_all_products(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_add_products, args=(data_file, prefix, 20)) for prefix in "AB"]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+    products = ProductManager(data_file).products
+    assert len(products) == 40
+    assert {p.title for p in products.values()} == {f"{prefix}{i}" for prefix in "AB" for i in range(20)}
+
+
+def _register(users_file, storage_mode, start, results, index):
+    manager = UserManager(users_file, storage_mode=storage_mode)
+    start.wait(10)
+    results.put(manager.register_user("alice", "abc123", f"alice{index}@test.com", "主校区"))
+
+
+@pytest.mark.parametrize("storage_mode", [
+    pytest.param("json", marks=pytest.mark.skipif(file_lock.fcntl is None, reason="需要 fcntl")),
+    # sqlite 没有锁文件，查重和写入在同一个 BEGIN IMMEDIATE 事务中
+    "sqlite",
+])
+def test_concurrent_registrations_reject_duplicate_username(tmp_path, storage_mode):
+    users_file = str(tmp_path / "users.json")
+    context = multiprocessing.get_context("fork")
+    start = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=_register, args=(users_file, storage_mode, start, results, i))
+                 for i in range(4)]
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+    assert sorted(results.get(timeout=5) for _ in processes) == [False, False, False, True]
+    assert len(UserManager(users_file, storage_mode=storage_mode).users) == 1
@@ -0,0 +1,246 @@
+import random
+import pytest
+from src.models.product import Product, ProductManager, ProductCategory, ProductStatus, encode_cursor
+from src.models.product_index import NGramIndex
+
+WORDS = ["二手", "教材", "Python", "鼠标", "无线", "iPad", "运动鞋", "九成新", "台灯", "KEY"]
+
+
+def brute_force(manager, keyword):
+    keyword = keyword.lower()
+    return {
+        p.product_id for p in manager.products.values()
+        if p.status == ProductStatus.ON_SALE
+        and (keyword in p.title.lower() or keyword in p.description.lower())
+    }
+
+
+def build_manager(tmp_path, count=200, seed=7, price_levels=500, storage_mode="journal", **kwargs):
+    tmp_path.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    manager = ProductManager(str(tmp_path / "products.json"), storage_mode=storage_mode, **kwargs)
+    for i in range(count):
+        title = "".join(rng.sample(WORDS, 2))
+        description = " ".join(rng.sample(WORDS, 3))
+        product = Product(str(i), title, description, rng.randint(1, price_levels),
+                          rng.choice(list(ProductCategory)), str(rng.randint(1, 20)),
+                          rng.choice(["东校区", "西校区", "主校区"]))
+        product.create_time = f"2024-01-{i % 28 + 1:02d} 10:00:00"
+        manager.add_product(product)
+        if rng.random() < 0.7:
+            manager.approve_product(product.product_id)
+    return manager
+
+
+def test_ngram_lookup_is_superset_of_substring_matches():
+    index = NGramIndex()
+    index.add("1", ("二手教材", "Python编程"))
+    index.add("2", ("无线鼠标", "手教"))
+    assert index.lookup("二手教") == {"1"}
+    assert index.lookup("python") == {"1"}
+    assert index.lookup("手") == {"1", "2"}
+    assert index.lookup("不存在") == set()
+    assert index.lookup("") is None
+
+    index.remove("1")
+    assert index.lookup("python") == set()
+    assert index.lookup("手") == {"2"}
+
+
+def test_ngram_index_survives_collisions_and_compaction():
+    # 只有 4 个桶，几乎所有片段都会冲突，结果仍须包含全部真正命中的文档
+    index = NGramIndex(buckets=4)
+    titles = {str(i): f"商品{i}号" for i in range(3000)}
+    for doc_id, title in titles.items():
+        index.add(doc_id, (title,))
+    for doc_id in list(titles)[:2500]:
+        index.remove(doc_id)
+        del titles[doc_id]
+    index.add("2999", ("改过的标题",))
+    titles["2999"] = "改过的标题"
+
+    assert len(index) == 500
+    for keyword in ["2600", "号", "改过", "商品2998号"]:
+        expected = {doc_id for doc_id, title in titles.items() if keyword in title}
+        assert expected <= index.lookup(keyword), keyword
+
+
+def test_keyword_search_matches_substring_semantics(tmp_path):
+    manager = build_manager(tmp_path)
+    queries = WORDS + ["手教", "py", "n鼠", "新 台", "k", "EY", "成", "不存在的词"]
+    for keyword in queries:
+        results = manager.search_products(keyword=keyword)
+        assert {p.product_id for p in results} == brute_force(manager, keyword), keyword
+
+
+def test_attribute_indexes_match_linear_scan(tmp_path):
+    manager = build_manager(tmp_path)
+    for category in [None] + list(ProductCategory):
+        for campus in ["", "东校区", "西校区"]:
+            results = manager.search_products(keyword="二手", category=category, campus=campus)
+            expected = {
+                pid for pid in brute_force(manager, "二手")
+                if (not category or manager.products[pid].category == category)
+                and (not campus or manager.products[pid].campus == campus)
+            }
+            assert {p.product_id for p in results} == expected
+
+    pending = manager.get_products_by_status(ProductStatus.PENDING)
+    assert {p.product_id for p in pending} == {
+        p.product_id for p in manager.products.values() if p.status == ProductStatus.PENDING
+    }
+    pending_id = pending[0].product_id
+    manager.approve_product(pending_id)
+    assert pending_id not in {p.product_id for p in manager.get_products_by_status(ProductStatus.PENDING)}
+
+    seller_products = manager.get_products_by_seller("3")
+    assert {p.product_id for p in seller_products} == {
+        p.product_id for p in manager.products.values() if p.seller_id == "3"
+    }
+
+
+def test_price_range_and_sorting(tmp_path):
+    manager = build_manager(tmp_path)
+    on_sale = [p for p in manager.products.values() if p.status == ProductStatus.ON_SALE]
+
+    results = manager.search_products(min_price=100, max_price=200)
+    assert {p.product_id for p in results} == {p.product_id for p in on_sale if 100 <= p.price <= 200}
+
+    results = manager.search_products(sort_by="price_asc")
+    assert [p.price for p in results] == sorted(p.price for p in on_sale)
+
+    results = manager.search_products(campus="东校区", min_price=50, sort_by="price_desc")
+    expected = sorted((p.price for p in on_sale if p.campus == "东校区" and p.price >= 50), reverse=True)
+    assert [p.price for p in results] == expected
+
+
+def test_time_ordering_and_limit(tmp_path):
+    manager = build_manager(tmp_path)
+
+    def expected(pred=lambda p: True):
+        on_sale = [p for p in manager.products.values() if p.status == ProductStatus.ON_SALE and pred(p)]
+        return [p.product_id for p in sorted(on_sale, key=lambda p: (p.create_time, p.product_id), reverse=True)]
+
+    assert [p.product_id for p in manager.search_products()] == expected()
+    assert [p.product_id for p in manager.search_products(limit=5)] == expected()[:5]
+
+    in_east = lambda p: p.campus == "东校区" and p.category == ProductCategory.BOOKS
+    results = manager.search_products(category=ProductCategory.BOOKS, campus="东校区", limit=3)
+    assert [p.product_id for p in results] == expected(in_east)[:3]
+
+    results = manager.search_products(sort_by="price_desc", limit=4)
+    assert [p.price for p in results] == sorted((p.price for p in manager.search_products()), reverse=True)[:4]
+
+
+def test_pagination_with_offset_and_cursor(tmp_path):
+    manager = build_manager(tmp_path)
+    full = [p.product_id for p in manager.search_products(campus="西校区")]
+
+    assert [p.product_id for p in manager.search_products(campus="西校区", limit=7, offset=7)] == full[7:14]
+
+    pages, cursor = [], None
+    while True:
+        page = manager.search_products(campus="西校区", limit=10, cursor=cursor)
+        pages.extend(p.product_id for p in page)
+        if len(page) < 10:
+            break
+        cursor = encode_cursor(page[-1])
+    assert pages == full
+
+    by_price = [p.product_id for p in manager.search_products(sort_by="price_asc")]
+    page = manager.search_products(sort_by="price_asc", limit=5, cursor=encode_cursor(offset=5))
+    assert [p.product_id for p in page] == by_price[5:10]
+
+
+def test_price_keyset_pagination(tmp_path):
+    # 价格取值少，大量同价商品检验游标在并列价格中间的位置
+    manager = build_manager(tmp_path, price_levels=15)
+    for sort_by in ["price_asc", "price_desc"]:
+        for filters in [{}, {"campus": "东校区"}, {"min_price": 5, "max_price": 12}, {"keyword": "二手"}]:
+            full = [p.product_id for p in manager.search_products(sort_by=sort_by, **filters)]
+            pages, cursor = [], None
+            while True:
+                page = manager.search_products(sort_by=sort_by, limit=6, cursor=cursor, **filters)
+                pages.extend(p.product_id for p in page)
+                if len(page) < 6:
+                    break
+                cursor = encode_cursor(page[-1], sort_by=sort_by)
+            assert pages == full, (sort_by, filters)
+
+    cursor = encode_cursor(manager.search_products(limit=1)[0])
+    with pytest.raises(ValueError):
+        manager.search_products(sort_by="price_asc", cursor=cursor)
+
+
+
+def test_time_order_with_irregular_timestamps(tmp_path):
+    manager = build_manager(tmp_path, count=60)
+    assert manager.time_index.packed
+
+    def canonical():
+        on_sale = [p for p in manager.products.values() if p.status == ProductStatus.ON_SALE]
+        return [p.product_id for p in sorted(on_sale, key=lambda p: (p.create_time or "", p.product_id),
+                                             reverse=True)]
+
+    # 整数键下用旧格式时间作游标
+    odd = Product("odd", "旧数据", "旧格式时间", 10, ProductCategory.OTHER, "1", "东校区")
+    odd.create_time = "2024/01/15"
+    assert [p.product_id for p in manager.search_products(cursor=encode_cursor(odd))] == \
+        [pid for pid in canonical() if ("2024/01/15", "odd") > (manager.products[pid].create_time, pid)]
+
+    # 加入无法压缩的时间后，索引改为按字符串比较，顺序不变
+    manager.add_product(odd)
+    manager.approve_product("odd")
+    blank = Product("blank", "无时间", "没有发布时间", 10, ProductCategory.OTHER, "1", "东校区")
+    blank.create_time = None
+    manager.add_product(blank)
+    manager.approve_product("blank")
+    assert not manager.time_index.packed
+    assert [p.product_id for p in manager.search_products()] == canonical()
+
+    pages, cursor = [], None
+    while True:
+        page = manager.search_products(limit=7, cursor=cursor)
+        pages.extend(p.product_id for p in page)
+        if len(page) < 7:
+            break
+        cursor = encode_cursor(page[-1])
+    assert pages == canonical()
+    # 需要排序的查询路径与时间索引一致
+    assert [p.product_id for p in manager.search_products(campus="东校区")] == \
+        [pid for pid in canonical() if manager.products[pid].campus == "东校区"]
+
+
+def test_sqlite_queries_match_memory_indexes(tmp_path):
+    # sqlite 模式在数据库中查询，结果须与内存索引完全一致
+    memory = build_manager(tmp_path / "journal", price_levels=30)
+    database = build_manager(tmp_path / "sqlite", price_levels=30, storage_mode="sqlite")
+    for manager in (memory, database):
+        blank = Product("blank", "二手无时间", "没有发布时间", 10, ProductCategory.OTHER, "3", "东校区")
+        blank.create_time = None
+        manager.add_product(blank)
+        manager.approve_product("blank")
+
+    def ids(manager, **query):
+        return [p.product_id for p in manager.search_products(**query)]
+
+    queries = [{"keyword": keyword} for keyword in WORDS + ["手教", "n鼠", "EY", "不存在的词"]]
+    queries += [{"category": category, "campus": campus}
+                for category in [None, ProductCategory.BOOKS] for campus in ["", "西校区"]]
+    queries += [{"min_price": 5, "max_price": 20}, {"min_price": 12}, {"max_price": 8, "keyword": "二手"}]
+    for query in queries:
+        for sort_by in ["time", "price_asc", "price_desc"]:
+            assert ids(database, sort_by=sort_by, **query) == ids(memory, sort_by=sort_by, **query), query
+            assert ids(database, sort_by=sort_by, limit=5, offset=3, **query) == \
+                ids(memory, sort_by=sort_by, limit=5, offset=3, **query), query
+            first = memory.search_products(sort_by=sort_by, limit=4, **query)
+            if first:
+                cursor = encode_cursor(first[-1], sort_by=sort_by)
+                assert ids(database, sort_by=sort_by, limit=6, cursor=cursor, **query) == \
+                    ids(memory, sort_by=sort_by, limit=6, cursor=cursor, **query), query
+
+    for status in ProductStatus:
+        assert sorted(p.product_id for p in database.get_products_by_status(status)) == \
+            sorted(p.product_id for p in memory.get_products_by_status(status))
+    assert sorted(p.product_id for p in database.get_products_by_seller("3")) == \
+        sorted(p.product_id for p in memory.get_products_by_seller("3"))
@@ -0,0 +1,94 @@
+import json
+import os
+from src.models.product import ProductManager, ProductStatus
+from tests.helpers import make_product
+
+
+def test_journal_append_and_replay(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    manager = ProductManager(data_file, storage_mode="journal")
+    manager.add_product(make_product("1"))
+    manager.add_product(make_product("2"))
+    manager.approve_product("1")
+
+    # 只追加日志，不重写快照
+    assert not os.path.exists(data_file)
+    with open(data_file + ".journal", encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+
+    reloaded = ProductManager(data_file, storage_mode="journal")
+    assert set(reloaded.products) == {"1", "2"}
+    assert reloaded.products["1"].status == ProductStatus.ON_SALE
+
+
+def test_journal_compaction(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    manager = ProductManager(data_file, storage_mode="journal", journal_threshold=3)
+    for i in range(5):
+        manager.add_product(make_product(str(i)))
+    manager.storage.wait()
+
+    with open(data_file, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert len(snapshot) >= 3
+    assert not os.path.exists(data_file + ".journal.old")
+
+    reloaded = ProductManager(data_file, storage_mode="journal")
+    assert len(reloaded.products) == 5
+
+
+def test_journal_skips_truncated_line(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    manager = ProductManager(data_file, storage_mode="journal")
+    manager.add_product(make_product("1"))
+    with open(data_file + ".journal", "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "key": "2", "da')
+
+    reloaded = ProductManager(data_file, storage_mode="journal")
+    assert list(reloaded.products) == ["1"]
+
+
+def test_compaction_while_adding_products(tmp_path, monkeypatch):
+    import threading
+
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", lambda args: errors.append(args.exc_value))
+    data_file = str(tmp_path / "products.json")
+    manager = ProductManager(data_file, storage_mode="journal", journal_threshold=50)
+    # 后台线程生成快照的同时主线程继续添加商品
+    for i in range(3000):
+        manager.add_product(make_product(str(i)))
+    manager.storage.wait()
+    assert errors == []
+    assert len(ProductManager(data_file, storage_mode="journal").products) == 3000
+
+
+def test_compaction_keeps_journal_merged_by_another_process(tmp_path):
+    import threading
+    from src.storage.journal import JournalStorage
+
+    data_file = str(tmp_path / "products.json")
+    first, second = JournalStorage(data_file), JournalStorage(data_file)
+    record = make_product("1").to_dict()
+    first.append("1", record)
+    release = threading.Event()
+
+    def stale_snapshot():
+        release.wait(10)
+        return {"1": record}
+
+    with first.locked():
+        first.compact(stale_snapshot)
+    # 第一个进程还在生成快照时，第二个进程写入并压缩，把新日志并入旧日志
+    with second.locked():
+        second.append("2", make_product("2").to_dict())
+        second.compact(lambda: {"1": record, "2": make_product("2").to_dict()})
+    second.wait()
+    release.set()
+    first.wait()
+
+    # 第一个进程的旧日志已被接管，不能再用缺少商品 2 的快照覆盖
+    assert set(JournalStorage(data_file).load()) == {"1", "2"}
+    with open(data_file, encoding="utf-8") as f:
+        assert set(json.load(f)) == {"1", "2"}
+    assert not os.path.exists(data_file + ".journal.old")
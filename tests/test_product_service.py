@@ -100,3 +100,92 @@ def test_get_products_by_seller_empty():
         assert p["seller_id"] == "1"
 
 
+
+def test_search_products_page(tmp_path):
+    from src.models.product import Product, ProductManager
+    from src.models.user import UserManager
+
+    product_manager = ProductManager(str(tmp_path / "products.json"))
+    service = ProductService(product_manager, UserManager(str(tmp_path / "users.json")))
+    # 价格有并列，检验按 (价格, 商品ID) 翻页
+    for i in range(10):
+        product = Product(str(i), f"台灯{i}", "宿舍用台灯", 10 + i // 2, ProductCategory.DAILY, "1", "主校区")
+        product.create_time = f"2024-01-{i + 1:02d} 10:00:00"
+        product_manager.add_product(product)
+        service.approve_product(str(i))
+
+    for sort_by in ["time", "price_asc", "price_desc"]:
+        expected = [p["product_id"] for p in service.search_products(sort_by=sort_by)]
+        seen, cursor = [], None
+        while True:
+            page = service.search_products_page(limit=3, sort_by=sort_by, cursor=cursor)
+            seen.extend(p["product_id"] for p in page["products"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == expected, sort_by
+
+    # 翻页期间排在已返回部分之前的商品上架，下一页既不重复也不跳过
+    first = service.search_products_page(limit=3, sort_by="price_asc")
+    remaining = [p["product_id"] for p in service.search_products(sort_by="price_asc")][3:6]
+    product_manager.add_product(Product("cheap", "旧台灯", "便宜", 1, ProductCategory.DAILY, "1", "主校区"))
+    service.approve_product("cheap")
+    second = service.search_products_page(limit=3, sort_by="price_asc", cursor=first["next_cursor"])
+    assert [p["product_id"] for p in second["products"]] == remaining
+
+def test_seller_cache_invalidated_on_register(tmp_path):
+    from src.models.product import Product, ProductManager
+    from src.models.user import UserManager
+
+    product_manager = ProductManager(str(tmp_path / "products.json"))
+    user_manager = UserManager(str(tmp_path / "users.json"))
+    service = ProductService(product_manager, user_manager)
+
+    product = Product("1", "台灯", "宿舍用台灯", 15, ProductCategory.DAILY, "1", "主校区")
+    product_manager.add_product(product)
+    service.approve_product("1")
+    assert service.search_products()[0]["seller_name"] == "未知用户"
+
+    user_manager.register_user("lamp_seller", "abc123", "lamp@test.com", "主校区")
+    assert service.search_products()[0]["seller_name"] == "lamp_seller"
+
+def test_search_cache_hits_and_invalidation(tmp_path):
+    from src.models.product import Product, ProductManager
+    from src.models.user import UserManager
+
+    product_manager = ProductManager(str(tmp_path / "products.json"))
+    service = ProductService(product_manager, UserManager(str(tmp_path / "users.json")))
+    product_manager.add_product(Product("1", "台灯", "宿舍用台灯", 15, ProductCategory.DAILY, "1", "主校区"))
+    service.approve_product("1")
+
+    assert len(service.search_products(keyword="台灯")) == 1
+    assert len(service.search_products(keyword="台灯")) == 1
+    assert service.cache_stats()["hits"] == 1
+
+    product_manager.add_product(Product("2", "台灯罩", "台灯配件", 5, ProductCategory.DAILY, "1", "主校区"))
+    service.approve_product("2")
+    assert len(service.search_products(keyword="台灯")) == 2
+    assert service.cache_stats() == {"hits": 1, "misses": 2, "size": 1}
+
+def test_bulk_publish_and_approve_save_once(tmp_path):
+    from src.models.product import ProductManager
+    from src.models.user import UserManager
+
+    product_manager = ProductManager(str(tmp_path / "products.json"))
+    service = ProductService(product_manager, UserManager(str(tmp_path / "users.json")))
+    saves = []
+    original_save = product_manager.storage.save
+    product_manager.storage.save = lambda changes, snapshot: (saves.append(len(changes)),
+                                                              original_save(changes, snapshot))
+
+    items = [{"title": f"教材{i}", "description": "九成新", "price": 10 + i, "category": ProductCategory.BOOKS,
+              "seller_id": "1", "campus": "主校区"} for i in range(30)]
+    result = service.publish_products(items)
+    assert result["success"] is True
+    assert len(service.get_pending_products()) == 30
+
+    product_ids = [product.product_id for product in result["products"]]
+    assert service.approve_products(product_ids + ["不存在"]) == product_ids
+    assert saves == [30, 30]
+    assert len(service.search_products(keyword="教材")) == 30
+    assert service.publish_products(items + [{"title": "", "description": "x", "price": 1}])["success"] is False
@@ -0,0 +1,60 @@
+import os
+import pytest
+from src.models.product import ProductManager, ProductStatus
+from src.models.user import UserManager
+from tests.helpers import make_product
+
+
+def test_sqlite_product_roundtrip(tmp_path):
+    data_file = str(tmp_path / "products.json")
+    manager = ProductManager(data_file, storage_mode="sqlite")
+    manager.add_product(make_product("1"))
+    manager.add_product(make_product("2"))
+    manager.approve_product("2")
+    manager.storage.close()
+
+    assert os.path.exists(str(tmp_path / "products.db"))
+    assert not os.path.exists(data_file)
+
+    reloaded = ProductManager(data_file, storage_mode="sqlite")
+    assert set(reloaded.products) == {"1", "2"}
+    assert reloaded.products["2"].status == ProductStatus.ON_SALE
+    assert reloaded.products["2"].to_dict() == manager.products["2"].to_dict()
+
+
+def test_sqlite_get_reads_single_row(tmp_path):
+    manager = ProductManager(str(tmp_path / "products.json"), storage_mode="sqlite")
+    manager.add_product(make_product("1", price=5, campus="东校区"))
+    manager.add_product(make_product("2", price=50, campus="东校区"))
+
+    assert manager.storage.get("1")["price"] == 5
+    assert manager.storage.get("不存在") is None
+
+
+def test_sqlite_user_storage(tmp_path):
+    data_file = str(tmp_path / "users.json")
+    manager = UserManager(data_file, storage_mode="sqlite")
+    assert manager.register_user("alice", "abc123", "alice@test.com", "主校区")
+
+    reloaded = UserManager(data_file, storage_mode="sqlite")
+    assert reloaded.authenticate_user("alice", "abc123") is not None
+    user = reloaded.get_user_by_username("alice")
+    assert reloaded.storage.get(user.user_id)["email"] == "alice@test.com"
+
+
+def test_sqlite_select_filters_sorts_and_pages(tmp_path):
+    manager = ProductManager(str(tmp_path / "products.json"), storage_mode="sqlite")
+    for pid, price, campus in [("1", 5, "东校区"), ("2", 50, "东校区"), ("3", 20, "西校区"), ("4", 20, "东校区")]:
+        manager.add_product(make_product(pid, price=price, campus=campus))
+    manager.add_product(make_product("5", title="Python教材", price=30))
+    storage = manager.storage
+
+    rows = storage.select(where={"campus": "东校区"}, ranges={"price": (10, None)}, order_by=("price", "id"))
+    assert [row["product_id"] for row in rows] == ["4", "2"]
+    rows = storage.select(order_by=("price", "id"), descending=True, after=(20, "4"), limit=2)
+    assert [row["product_id"] for row in rows] == ["3", "1"]
+    rows = storage.select(contains=("python", ("title", "description")))
+    assert [row["product_id"] for row in rows] == ["5"]
+    assert [row["product_id"] for row in storage.select(order_by=("price", "id"), offset=3)] == ["5", "2"]
+    with pytest.raises(ValueError):
+        storage.select(where={"description": "x"})
@@ -0,0 +1,20 @@
+from src.models.user import UserManager
+
+
+def test_register_rejects_duplicate_username_and_email(tmp_path):
+    manager = UserManager(str(tmp_path / "users.json"))
+    assert manager.register_user("alice", "abc123", "alice@test.com", "主校区") is True
+    assert manager.register_user("alice", "abc123", "other@test.com", "主校区") is False
+    assert manager.register_user("bob", "abc123", "alice@test.com", "主校区") is False
+    assert manager.register_user("bob", "abc123", "bob@test.com", "东校区") is True
+
+
+def test_indexes_rebuilt_on_load(tmp_path):
+    data_file = str(tmp_path / "users.json")
+    UserManager(data_file).register_user("alice", "abc123", "alice@test.com", "主校区")
+
+    reloaded = UserManager(data_file)
+    assert reloaded.get_user_by_username("alice").email == "alice@test.com"
+    assert reloaded.authenticate_user("alice", "abc123") is not None
+    assert reloaded.authenticate_user("alice", "wrong1") is None
+    assert reloaded.register_user("carol", "abc123", "alice@test.com", "主校区") is False